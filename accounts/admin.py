@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, ConnectionRequest
+from .models import User, ConnectionRequest, Suggestion
 
 
 @admin.register(User)
@@ -25,3 +25,10 @@ class ConnectionRequestAdmin(admin.ModelAdmin):
     raw_id_fields = ('sender', 'receiver')
     readonly_fields = ('created_at', 'updated_at')
 
+
+@admin.register(Suggestion)
+class SuggestionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'candidate', 'mutual_count', 'computed_at')
+    search_fields = ('user__username', 'candidate__username')
+    raw_id_fields = ('user', 'candidate')
+    readonly_fields = ('computed_at',)
@@ -0,0 +1,214 @@
+"""
+Cached follow / connection graph.
+
+Each user's adjacency lists (who they follow, who follows them, who they
+are connected to) are cached as sorted ``array('q')`` int arrays: compact
+to pickle and checked with a binary search. Lookups are batched: one
+``get_many`` for many users, and one query per edge kind for every miss.
+
+Invalidation is versioned. Every user has a version counter in the cache
+and it is part of the adjacency keys, so bumping it (``invalidate``) makes
+all of that user's cached lists unreachable at once. The accounts signals
+bump both endpoints whenever a follow or connection row is added or
+removed, which covers ``follow_user`` and ``respond_connection_request``.
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+
+FOLLOWING, FOLLOWERS, CONNECTIONS = 'following', 'followers', 'connections'
+KINDS = (FOLLOWING, FOLLOWERS, CONNECTIONS)
+
+
+class Adjacency:
+    """Sorted, de-duplicated user ids with set-like membership."""
+
+    __slots__ = ('ids',)
+
+    def __init__(self, ids=()):
+        self.ids = array('q', sorted(set(ids)))
+
+    def __contains__(self, user_id):
+        i = bisect_left(self.ids, user_id)
+        return i < len(self.ids) and self.ids[i] == user_id
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+    def __getstate__(self):
+        return self.ids.tobytes()
+
+    def __setstate__(self, state):
+        self.ids = array('q')
+        self.ids.frombytes(state)
+
+    def intersection(self, other):
+        """Ids in both, by a linear merge of the two sorted arrays."""
+        a, b = self.ids, other.ids
+        i = j = 0
+        out = []
+        while i < len(a) and j < len(b):
+            if a[i] == b[j]:
+                out.append(a[i])
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+        result = Adjacency()
+        result.ids = array('q', out)
+        return result
+
+
+def _timeout():
+    return getattr(settings, 'GRAPH_CACHE_TIMEOUT', 3600)
+
+
+def _version_key(user_id):
+    return f"graph:v:{user_id}"
+
+
+def _initial_version():
+    # Time based, so a version key that was evicted never restarts at a
+    # number whose adjacency entries may still be cached
+    return int(time.time() * 1000)
+
+
+def _versions(user_ids):
+    keys = {uid: _version_key(uid) for uid in user_ids}
+    found = cache.get_many(list(keys.values()))
+    missing = {key for key in keys.values() if key not in found}
+    if missing:
+        initial = _initial_version()
+        for key in missing:
+            cache.add(key, initial, timeout=None)
+        found.update(cache.get_many(list(missing)))
+    return {uid: found.get(key, 0) for uid, key in keys.items()}
+
+
+def _adjacency_key(kind, user_id, version):
+    return f"graph:{kind}:{user_id}:{version}"
+
+
+def _query(kind, user_ids):
+    """Load ``kind`` adjacency for ``user_ids`` from the M2M tables (one query)."""
+    User = get_user_model()
+    # followers is symmetrical=False: the row (from_user=X, to_user=Y) means Y follows X
+    if kind == FOLLOWING:
+        rows = User.followers.through.objects.filter(to_user_id__in=user_ids).values_list('to_user_id', 'from_user_id')
+    elif kind == FOLLOWERS:
+        rows = User.followers.through.objects.filter(from_user_id__in=user_ids).values_list('from_user_id', 'to_user_id')
+    else:
+        rows = User.connections.through.objects.filter(from_user_id__in=user_ids).values_list('from_user_id', 'to_user_id')
+    grouped = {uid: [] for uid in user_ids}
+    for owner, other in rows:
+        grouped[owner].append(other)
+    return {uid: Adjacency(ids) for uid, ids in grouped.items()}
+
+
+def load(kinds, user_ids):
+    """``{kind: {user_id: Adjacency}}`` for several kinds and many users.
+
+    Costs two cache round trips (versions, lists) plus one query per kind
+    that has misses.
+    """
+    user_ids = list(set(user_ids))
+    result = {kind: {} for kind in kinds}
+    if not user_ids:
+        return result
+    versions = _versions(user_ids)
+    keys = {(kind, uid): _adjacency_key(kind, uid, versions[uid]) for kind in kinds for uid in user_ids}
+    cached = cache.get_many(list(keys.values()))
+    to_cache = {}
+    for kind in kinds:
+        found = {uid: cached[keys[kind, uid]] for uid in user_ids if keys[kind, uid] in cached}
+        missing = [uid for uid in user_ids if uid not in found]
+        if missing:
+            loaded = _query(kind, missing)
+            to_cache.update({keys[kind, uid]: adj for uid, adj in loaded.items()})
+            found.update(loaded)
+        result[kind] = found
+    if to_cache:
+        cache.set_many(to_cache, timeout=_timeout())
+    return result
+
+
+def load_many(kind, user_ids):
+    """``{user_id: Adjacency}`` of ``kind`` for many users at once."""
+    return load([kind], user_ids)[kind]
+
+
+def following(user_id):
+    return load_many(FOLLOWING, [user_id])[user_id]
+
+
+def followers(user_id):
+    return load_many(FOLLOWERS, [user_id])[user_id]
+
+
+def connections(user_id):
+    return load_many(CONNECTIONS, [user_id])[user_id]
+
+
+def mutuals(user_id):
+    """Users that ``user_id`` follows and who follow back."""
+    adj = load([FOLLOWING, FOLLOWERS], [user_id])
+    return adj[FOLLOWING][user_id].intersection(adj[FOLLOWERS][user_id])
+
+
+def neighbourhood(user_id):
+    """Everyone adjacent to ``user_id`` in any direction, plus the user."""
+    ids = {user_id}
+    for by_user in load(KINDS, [user_id]).values():
+        ids.update(by_user[user_id])
+    return ids
+
+
+def follower_counts(user_ids):
+    """``{user_id: number of followers}``, cached like the lists but without
+    loading the (possibly huge) follower lists themselves."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    versions = _versions(user_ids)
+    keys = {uid: _adjacency_key('followers_count', uid, versions[uid]) for uid in user_ids}
+    cached = cache.get_many(list(keys.values()))
+    result = {uid: cached[key] for uid, key in keys.items() if key in cached}
+    missing = [uid for uid in user_ids if uid not in result]
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        loaded.update(
+            get_user_model().followers.through.objects
+            .filter(from_user_id__in=missing)
+            .values('from_user_id').annotate(n=Count('*'))
+            .values_list('from_user_id', 'n')
+        )
+        cache.set_many({keys[uid]: n for uid, n in loaded.items()}, timeout=_timeout())
+        result.update(loaded)
+    return result
+
+
+def invalidate(*user_ids):
+    """Bump the graph version of ``user_ids`` so their cached lists are reloaded."""
+    for uid in set(user_ids):
+        key = _version_key(uid)
+        if cache.add(key, _initial_version(), timeout=None):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, _initial_version(), timeout=None)
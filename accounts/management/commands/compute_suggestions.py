@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.suggestions import refresh_all, refresh_stale
+
+
+class Command(BaseCommand):
+    help = "Recompute \"people you may know\" suggestions (incremental by default, run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every user instead of only stale ones')
+        parser.add_argument('--limit', type=int, default=1000, help='Stale users to process per batch')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            count = refresh_all()
+        else:
+            count = 0
+            while True:
+                refreshed = refresh_stale(limit=options['limit'])
+                if not refreshed:
+                    break
+                count += refreshed
+        self.stdout.write(self.style.SUCCESS(f"Refreshed suggestions for {count} users"))
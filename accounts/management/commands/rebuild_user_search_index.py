@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the user full-text search index (SQLite FTS5; PostgreSQL indexes are maintained by the database)"
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} users"))
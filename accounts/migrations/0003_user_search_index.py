@@ -0,0 +1,46 @@
+from django.db import migrations
+
+from accounts.search import FTS_TABLE, PG_DOCUMENT_SQL, SEARCH_FIELDS
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    User = apps.get_model('accounts', 'User')
+    table = User._meta.db_table
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(SEARCH_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+            f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM {table}"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS accounts_user_search_idx ON {table} USING GIN ({PG_DOCUMENT_SQL})"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS accounts_user_username_trgm_idx ON {table} USING GIN (username gin_trgm_ops)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_search_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_username_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_cover_photo_renditions_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
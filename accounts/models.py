@@ -18,6 +18,9 @@ class User(AbstractUser):
     is_private = models.BooleanField(default=False)
     is_email_verified = models.BooleanField(default=False)
     cover_photo = models.ImageField(upload_to='covers/', blank=True, null=True)
+    # Resized copies of the images above, {size: storage name}
+    profile_picture_renditions = models.JSONField(default=dict, blank=True)
+    cover_photo_renditions = models.JSONField(default=dict, blank=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -51,4 +54,31 @@ class ConnectionRequest(models.Model):
         unique_together = ('sender', 'receiver')
 
     def __str__(self):
-        return f"{self.sender_id} -> {self.receiver_id} ({self.status})"
\ No newline at end of file
+        return f"{self.sender_id} -> {self.receiver_id} ({self.status})"
+
+
+class Suggestion(models.Model):
+    """Precomputed "people you may know" candidate for ``user``.
+
+    Written by the offline job in accounts.suggestions; the endpoint only
+    reads the top rows of ``suggestion_rank_idx``.
+    """
+    user = models.ForeignKey(User, related_name='suggestions', on_delete=models.CASCADE)
+    candidate = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    mutual_count = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-mutual_count', 'candidate'], name='suggestion_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Suggestion({self.candidate_id} for {self.user_id}: {self.mutual_count})"
+
+
+class SuggestionRefresh(models.Model):
+    """A user whose suggestions are stale because an edge near them changed."""
+    user = models.OneToOneField(User, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    requested_at = models.DateTimeField()
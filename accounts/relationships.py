@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import graph
+from .models import ConnectionRequest
+
+
+class RelationshipResolver:
+    """Viewer-relative follow/connection/pending-request state for many users.
+
+    Follow and connection state comes from the cached graph (accounts.graph)
+    and pending requests from one query, so list views can serialize any
+    number of users at a constant query cost.
+    """
+
+    def __init__(self, viewer, user_ids):
+        self.following = set()
+        self.connected = set()
+        self.pending = set()
+        user_ids = list(set(user_ids))
+        if not viewer or not viewer.is_authenticated or not user_ids:
+            return
+        adjacency = graph.load([graph.FOLLOWING, graph.CONNECTIONS], [viewer.id])
+        following = adjacency[graph.FOLLOWING][viewer.id]
+        connected = adjacency[graph.CONNECTIONS][viewer.id]
+        self.following = {uid for uid in user_ids if uid in following}
+        self.connected = {uid for uid in user_ids if uid in connected}
+        for sender_id, receiver_id in (
+            ConnectionRequest.objects
+            .filter(status=ConnectionRequest.Status.PENDING)
+            .filter(
+                Q(sender_id=viewer.id, receiver_id__in=user_ids)
+                | Q(receiver_id=viewer.id, sender_id__in=user_ids)
+            )
+            .values_list('sender_id', 'receiver_id')
+        ):
+            self.pending.add(receiver_id if sender_id == viewer.id else sender_id)
+
+    def is_following(self, user_id):
+        return user_id in self.following
+
+    def is_connected(self, user_id):
+        return user_id in self.connected
+
+    def has_pending_request(self, user_id):
+        return user_id in self.pending
+
+
+def _edge_count(column):
+    through = get_user_model().followers.through
+    counts = (
+        through.objects
+        .filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(c=Count('*'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def with_follow_counts(queryset):
+    """Annotate followers/following counts so the serializer does not run COUNT per user."""
+    return queryset.annotate(
+        followers_total=_edge_count('from_user'),
+        following_total=_edge_count('to_user'),
+    )
+
+
+def user_list_context(request, users):
+    """Serializer context for a list of users with relationships resolved in bulk."""
+    return {
+        'request': request,
+        'relationships': RelationshipResolver(request.user, [u.id for u in users]),
+    }
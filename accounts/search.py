@@ -0,0 +1,140 @@
+"""
+Indexed user search.
+
+- PostgreSQL: a GIN index on a ``tsvector`` expression over the searchable
+  columns plus a trigram index on ``username``; the database keeps both up
+  to date on every write.
+- SQLite: an FTS5 virtual table (``accounts_user_fts``) keyed by user id,
+  refreshed from ``post_save``/``post_delete`` signals.
+- Anything else falls back to the old ``icontains`` scan.
+
+Every query term is prefix-matched for typeahead. Results are ranked by text
+relevance, then boosted when the viewer follows or is connected to the user.
+"""
+
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+
+from .relationships import RelationshipResolver
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'bio', 'location')
+FTS_TABLE = 'accounts_user_fts'
+
+# Keep in sync with the expression index created in migration 0003
+PG_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(username, '') || ' ' || coalesce(first_name, '') || ' ' || "
+    "coalesce(last_name, '') || ' ' || coalesce(bio, '') || ' ' || coalesce(location, ''))"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+    return _TOKEN_RE.findall(query.lower())[:8]
+
+
+def graph_boost():
+    return getattr(settings, 'USER_SEARCH_GRAPH_BOOST', 1.0)
+
+
+def candidate_limit():
+    return getattr(settings, 'USER_SEARCH_CANDIDATES', 200)
+
+
+# ---- index maintenance (SQLite FTS5) ----
+
+def index_user(user):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [user.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+            [user.pk] + [getattr(user, f) or '' for f in SEARCH_FIELDS],
+        )
+
+
+def unindex_user(user_id):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [user_id])
+
+
+def rebuild_index():
+    """Reindex every user (SQLite); a no-op on PostgreSQL where the index is an expression."""
+    if connection.vendor != 'sqlite':
+        return 0
+    User = get_user_model()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    count = 0
+    for user in User.objects.only('pk', *SEARCH_FIELDS).iterator(chunk_size=2000):
+        index_user(user)
+        count += 1
+    return count
+
+
+# ---- querying ----
+
+def _sqlite_candidates(terms, limit):
+    # "term"* is an FTS5 prefix query; quoting neutralizes FTS syntax in input
+    match = ' '.join(f'"{t}"*' for t in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, -bm25({FTS_TABLE}, 10.0, 5.0, 5.0, 1.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [match, limit],
+        )
+        return cursor.fetchall()
+
+
+def _postgres_candidates(query, terms, limit):
+    tsquery = ' & '.join(f"{t}:*" for t in terms)
+    User = get_user_model()
+    table = User._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, ts_rank({PG_DOCUMENT_SQL}, to_tsquery('simple', %s)) + similarity(username, %s) AS score "
+            f"FROM {table} "
+            f"WHERE {PG_DOCUMENT_SQL} @@ to_tsquery('simple', %s) OR username %% %s "
+            f"ORDER BY score DESC LIMIT %s",
+            [tsquery, query, tsquery, query, limit],
+        )
+        return cursor.fetchall()
+
+
+def _fallback_candidates(query, limit):
+    User = get_user_model()
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': query})
+    return [(pk, 0.0) for pk in User.objects.filter(condition).values_list('pk', flat=True)[:limit]]
+
+
+def search_user_ids(query, viewer=None, limit=50):
+    """Return up to ``limit`` user ids matching ``query``, best match first."""
+    terms = _terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'sqlite':
+        scored = _sqlite_candidates(terms, candidate_limit())
+    elif connection.vendor == 'postgresql':
+        scored = _postgres_candidates(query, terms, candidate_limit())
+    else:
+        scored = _fallback_candidates(query, candidate_limit())
+
+    if viewer is not None:
+        scored = [(pk, score) for pk, score in scored if pk != viewer.pk]
+        relationships = RelationshipResolver(viewer, [pk for pk, _ in scored])
+        boost = graph_boost()
+        scored = [
+            (pk, score + boost * (relationships.is_following(pk) + relationships.is_connected(pk)))
+            for pk, score in scored
+        ]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [pk for pk, _ in scored[:limit]]
@@ -1,12 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from . import graph
 from .models import ConnectionRequest
+from main.renditions import rendition_url
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.ReadOnlyField()
-    following_count = serializers.ReadOnlyField()
+    followers_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     is_connected = serializers.SerializerMethodField()
     has_pending_request = serializers.SerializerMethodField()
@@ -23,17 +25,31 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'email', 'created_at']
 
+    def get_followers_count(self, obj):
+        # Annotated by accounts.relationships.with_follow_counts on list views
+        total = getattr(obj, 'followers_total', None)
+        return obj.followers_count if total is None else total
+
+    def get_following_count(self, obj):
+        total = getattr(obj, 'following_total', None)
+        return obj.following_count if total is None else total
+
     def get_is_following(self, obj):
         """Check if current user follows this user"""
+        relationships = self.context.get('relationships')
+        if relationships is not None:
+            return relationships.is_following(obj.id)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return request.user.following.filter(id=obj.id).exists()
+            return obj.id in graph.following(request.user.id)
         return False
 
     def get_profile_picture_url(self, obj):
         if obj.profile_picture:
             request = self.context.get('request')
-            url = obj.profile_picture.url
+            # Lists show small avatars; profile pages ask for 'feed'
+            size = self.context.get('avatar_size', 'thumb')
+            url = rendition_url(obj.profile_picture, obj.profile_picture_renditions, size)
             
             # If it's already a full URL (Cloudinary), return as is
             if url.startswith('http'):
@@ -44,12 +60,18 @@ class UserSerializer(serializers.ModelSerializer):
         return None
 
     def get_is_connected(self, obj):
+        relationships = self.context.get('relationships')
+        if relationships is not None:
+            return relationships.is_connected(obj.id)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return request.user.connections.filter(id=obj.id).exists()
+            return obj.id in graph.connections(request.user.id)
         return False
 
     def get_has_pending_request(self, obj):
+        relationships = self.context.get('relationships')
+        if relationships is not None:
+            return relationships.has_pending_request(obj.id)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return ConnectionRequest.objects.filter(
@@ -62,7 +84,7 @@ class UserSerializer(serializers.ModelSerializer):
     def get_cover_photo_url(self, obj):
         if obj.cover_photo:
             request = self.context.get('request')
-            url = obj.cover_photo.url
+            url = rendition_url(obj.cover_photo, obj.cover_photo_renditions, 'full')
             
             # If it's already a full URL (Cloudinary), return as is
             if url.startswith('http'):
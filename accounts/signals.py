@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import graph, suggestions
+from .search import SEARCH_FIELDS, index_user, unindex_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_user(instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_user(instance.pk)
+
+
+def _graph_neighbours(through, user_id):
+    rows = through.objects.filter(from_user_id=user_id).values_list('to_user_id', flat=True)
+    reverse = through.objects.filter(to_user_id=user_id).values_list('from_user_id', flat=True)
+    return set(rows) | set(reverse)
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+@receiver(m2m_changed, sender=User.connections.through)
+def invalidate_graph(sender, instance, action, pk_set=None, **kwargs):
+    """Bump the cached graph version of both ends of every changed edge.
+
+    Bumped now for readers in this transaction and again on commit, so a
+    concurrent reader cannot keep the old adjacency cached under the new
+    version. The same users are queued for a suggestions refresh.
+    """
+    if action == 'pre_clear':
+        # The other ends are gone after the clear; remember them now
+        instance._graph_cleared = _graph_neighbours(sender, instance.pk)
+        return
+    if action == 'post_clear':
+        user_ids = {instance.pk, *getattr(instance, '_graph_cleared', ())}
+    elif action in ('post_add', 'post_remove'):
+        user_ids = {instance.pk, *(pk_set or ())}
+    else:
+        return
+    graph.invalidate(*user_ids)
+    transaction.on_commit(lambda: graph.invalidate(*user_ids))
+    suggestions.mark_stale(*user_ids)
@@ -0,0 +1,176 @@
+"""
+"People you may know": friend-of-friend suggestions computed offline.
+
+A user's neighbours are everyone they follow, are followed by or are
+connected to. A candidate's score is the number of neighbours it shares
+with the user, counted by walking neighbours of neighbours (one set pass
+per user). Users already followed or connected, the user themselves, and
+anyone with a pending connection request either way are skipped. The top
+``SUGGESTIONS_TOP_K`` candidates per user are stored in ``Suggestion``, so
+serving them is one read of ``suggestion_rank_idx``.
+
+Neighbours with more than ``SUGGESTIONS_HUB_DEGREE`` neighbours are not
+walked through: following the same celebrity says little about knowing
+each other, and hubs dominate the cost of the pass.
+
+``compute_suggestions --full`` rebuilds everything from the M2M tables.
+Without ``--full`` it refreshes incrementally. Graph changes mark both
+endpoints stale (``mark_stale``), and the job recomputes the stale users
+plus their neighbours, whose two-hop neighbourhood changed too. The
+adjacency for that pass comes from the cached graph (accounts.graph).
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import graph
+from .models import ConnectionRequest, Suggestion, SuggestionRefresh
+
+BATCH_SIZE = 1000
+
+
+def top_k():
+    return getattr(settings, 'SUGGESTIONS_TOP_K', 50)
+
+
+def hub_degree():
+    return getattr(settings, 'SUGGESTIONS_HUB_DEGREE', 1000)
+
+
+def _full_adjacency():
+    """Undirected neighbour sets and "already linked" sets for the whole graph."""
+    User = get_user_model()
+    neighbours = defaultdict(set)
+    linked = defaultdict(set)
+    # followers is symmetrical=False: the row (from_user=X, to_user=Y) means Y follows X
+    for target, follower in User.followers.through.objects.values_list('from_user_id', 'to_user_id').iterator(chunk_size=10000):
+        neighbours[target].add(follower)
+        neighbours[follower].add(target)
+        linked[follower].add(target)
+    for a, b in User.connections.through.objects.values_list('from_user_id', 'to_user_id').iterator(chunk_size=10000):
+        neighbours[a].add(b)
+        linked[a].add(b)
+    return neighbours, linked
+
+
+def _cached_adjacency(user_ids):
+    """Neighbour and linked sets for ``user_ids`` and their neighbours, from the cached graph."""
+    first = graph.load(graph.KINDS, user_ids)
+    neighbours, linked = {}, {}
+    for uid in user_ids:
+        following = first[graph.FOLLOWING][uid]
+        connected = first[graph.CONNECTIONS][uid]
+        neighbours[uid] = set(following) | set(first[graph.FOLLOWERS][uid]) | set(connected)
+        linked[uid] = set(following) | set(connected)
+    second_ids = set().union(*neighbours.values()) - set(neighbours) if neighbours else set()
+    second = graph.load(graph.KINDS, second_ids)
+    for uid in second_ids:
+        neighbours[uid] = set().union(*(second[kind][uid] for kind in graph.KINDS))
+    return neighbours, linked
+
+
+def _pending_pairs(user_ids):
+    pending = defaultdict(set)
+    for sender, receiver in (
+        ConnectionRequest.objects
+        .filter(status=ConnectionRequest.Status.PENDING)
+        .filter(Q(sender_id__in=user_ids) | Q(receiver_id__in=user_ids))
+        .values_list('sender_id', 'receiver_id')
+    ):
+        pending[sender].add(receiver)
+        pending[receiver].add(sender)
+    return pending
+
+
+def rank_candidates(user_id, neighbours, linked, pending=(), limit=None):
+    """``[(candidate_id, mutual_count)]`` for one user, best first."""
+    limit = top_k() if limit is None else limit
+    hub = hub_degree()
+    mutual = Counter()
+    for friend in neighbours.get(user_id, ()):
+        friends_of_friend = neighbours.get(friend, ())
+        if len(friends_of_friend) > hub:
+            continue
+        mutual.update(friends_of_friend)
+    excluded = linked.get(user_id, set()) | set(pending) | {user_id}
+    ranked = sorted(
+        ((cid, n) for cid, n in mutual.items() if cid not in excluded),
+        key=lambda item: (-item[1], item[0]),
+    )
+    return ranked[:limit]
+
+
+def _store(results, now):
+    """Replace the stored suggestions of every user in ``results``."""
+    with transaction.atomic():
+        user_ids = list(results)
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            Suggestion.objects.filter(user_id__in=user_ids[start:start + BATCH_SIZE]).delete()
+        Suggestion.objects.bulk_create(
+            [
+                Suggestion(user_id=uid, candidate_id=cid, mutual_count=n, computed_at=now)
+                for uid, ranked in results.items() for cid, n in ranked
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def refresh(user_ids, neighbours, linked):
+    now = timezone.now()
+    pending = _pending_pairs(user_ids)
+    results = {uid: rank_candidates(uid, neighbours, linked, pending.get(uid, ())) for uid in user_ids}
+    _store(results, now)
+    return len(results)
+
+
+def refresh_all():
+    """Recompute suggestions for every user from the M2M tables. Returns users refreshed."""
+    User = get_user_model()
+    started = timezone.now()
+    neighbours, linked = _full_adjacency()
+    user_ids = list(User.objects.values_list('id', flat=True))
+    total = 0
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        total += refresh(user_ids[start:start + BATCH_SIZE], neighbours, linked)
+    SuggestionRefresh.objects.filter(requested_at__lte=started).delete()
+    return total
+
+
+def mark_stale(*user_ids):
+    """Queue ``user_ids`` for the next incremental refresh."""
+    now = timezone.now()
+    SuggestionRefresh.objects.bulk_create(
+        [SuggestionRefresh(user_id=uid, requested_at=now) for uid in set(user_ids)],
+        update_conflicts=True, unique_fields=['user'], update_fields=['requested_at'],
+    )
+
+
+def refresh_stale(limit=BATCH_SIZE):
+    """Refresh up to ``limit`` stale users and their neighbours. Returns users refreshed."""
+    started = timezone.now()
+    stale = list(
+        SuggestionRefresh.objects.filter(requested_at__lte=started)
+        .order_by('requested_at').values_list('user_id', flat=True)[:limit]
+    )
+    if not stale:
+        return 0
+    # Edges at a stale user also change the two-hop neighbourhood of its neighbours
+    direct = graph.load(graph.KINDS, stale)
+    affected = set(stale)
+    for by_user in direct.values():
+        for adjacency in by_user.values():
+            if len(adjacency) <= hub_degree():
+                affected.update(adjacency)
+    affected = sorted(affected)
+    total = 0
+    for start in range(0, len(affected), BATCH_SIZE):
+        batch = affected[start:start + BATCH_SIZE]
+        neighbours, linked = _cached_adjacency(batch)
+        total += refresh(batch, neighbours, linked)
+    SuggestionRefresh.objects.filter(user_id__in=stale, requested_at__lte=started).delete()
+    return total
@@ -1,3 +1,85 @@
 from django.test import TestCase
 
-# Create your tests here.
+from main.testing import QueryBudgetMixin
+from . import suggestions
+from .models import Suggestion, SuggestionRefresh, User
+
+
+class UserListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """User lists resolve counts and relationship flags per page, not per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        for i in range(20):
+            user = User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='x')
+            cls.viewer.followers.add(user)
+            cls.viewer.following.add(user)
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+
+    def test_followers_budget(self):
+        response = self.client.get('/api/auth/followers/')
+        self.assertEqual(len(response.json()), 20)
+        self.assertQueryBudget(response, 7)
+
+    def test_following_budget(self):
+        response = self.client.get('/api/auth/following/')
+        self.assertEqual(len(response.json()), 20)
+        self.assertQueryBudget(response, 7)
+
+    def test_lists_use_thumbnail_avatars(self):
+        fan = User.objects.get(username='fan0')
+        fan.profile_picture = 'profiles/fan0.png'
+        fan.profile_picture_renditions = {'thumb': 'renditions/fan0_thumb.webp', 'feed': 'renditions/fan0_feed.webp'}
+        fan.save()
+        listed = next(u for u in self.client.get('/api/auth/followers/').json() if u['id'] == fan.pk)
+        self.assertTrue(listed['profile_picture_url'].endswith('fan0_thumb.webp'))
+        profile = self.client.get(f'/api/auth/profile/{fan.pk}/').json()
+        self.assertTrue(profile['profile_picture_url'].endswith('fan0_feed.webp'))
+
+
+class SuggestionTests(TestCase):
+    """Friend-of-friend suggestions: batch job plus a single indexed read."""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol, self.dave, self.erin = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('alice', 'bob', 'carol', 'dave', 'erin')
+        ]
+        # alice follows bob and carol, who both follow dave; erin only knows bob
+        self.alice.following.add(self.bob, self.carol)
+        self.bob.following.add(self.dave)
+        self.carol.following.add(self.dave)
+        self.erin.following.add(self.bob)
+        suggestions.refresh_all()
+
+    def ranked(self, user):
+        return list(
+            Suggestion.objects.filter(user=user).order_by('-mutual_count', 'candidate_id')
+            .values_list('candidate__username', 'mutual_count')
+        )
+
+    def test_ranked_by_mutual_count(self):
+        self.assertEqual(self.ranked(self.alice), [('dave', 2), ('erin', 1)])
+        self.assertFalse(SuggestionRefresh.objects.exists())
+
+    def test_graph_change_refreshes_incrementally(self):
+        self.alice.following.add(self.dave)
+        self.assertTrue(SuggestionRefresh.objects.filter(user=self.alice).exists())
+        suggestions.refresh_stale()
+        self.assertEqual(self.ranked(self.alice), [('erin', 1)])
+        # dave's two-hop neighbourhood changed too: bob and carol now share alice with him
+        self.assertIn(('bob', 1), self.ranked(self.dave))
+        self.assertFalse(SuggestionRefresh.objects.exists())
+
+    def test_endpoint_serves_precomputed_rows(self):
+        self.client.force_login(self.alice)
+        self.alice.following.add(self.erin)  # followed since the last refresh
+        response = self.client.get('/api/auth/suggestions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(u['username'], u['mutual_count']) for u in response.json()],
+            [('dave', 2)],
+        )
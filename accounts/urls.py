@@ -23,6 +23,7 @@ urlpatterns = [
     path('connections/', views.get_connections, name='get-connections'),
     path('connections/<int:user_id>/', views.get_connections, name='get-user-connections'),
     path('search/', views.search_users, name='search-users'),
+    path('suggestions/', views.get_suggestions, name='user-suggestions'),
     # Connections
     path('connections/requests/', views.list_connection_requests, name='list-connection-requests'),
     path('connections/request/<int:user_id>/', views.send_connection_request, name='send-connection-request'),
@@ -6,14 +6,20 @@ from django.contrib.auth import get_user_model, authenticate, login, logout
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
 from django.middleware.csrf import get_token
 from .serializers import UserSerializer
-from .models import ConnectionRequest
+from .models import ConnectionRequest, Suggestion
+from .relationships import user_list_context, with_follow_counts
+from .search import search_user_ids
+from posts.cache import invalidate_author
+from main.instrumentation import timed
+from main.renditions import schedule_renditions
+from notifications.models import Notification
+from notifications.services import notify
 from .validators import validate_password_strength
 from django.conf import settings
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.core.mail import send_mail
 from urllib.parse import urlencode
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
 from rest_framework.authentication import SessionAuthentication
 
 
@@ -65,7 +71,7 @@ def send_verification_email(user):
 @permission_classes([IsAuthenticated])
 def get_user_profile(request):
     """Get current user profile"""
-    serializer = UserSerializer(request.user, context={'request': request})
+    serializer = UserSerializer(request.user, context={'request': request, 'avatar_size': 'feed'})
     return Response(serializer.data)
 
 
@@ -77,7 +83,7 @@ def get_user_profile_by_id(request, user_id: int):
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-    serializer = UserSerializer(user, context={'request': request})
+    serializer = UserSerializer(user, context={'request': request, 'avatar_size': 'feed'})
     return Response(serializer.data)
 
 @api_view(['PUT'])
@@ -86,37 +92,33 @@ def get_user_profile_by_id(request, user_id: int):
 def update_user_profile(request):
     """Update current user profile. Accepts JSON or multipart for image uploads."""
     try:
-        print(f"Profile update request from: {request.META.get('HTTP_ORIGIN', 'No origin')}")
-        print(f"Profile update data: {request.data}")
-        print(f"Profile update files: {request.FILES}")
-        print(f"User: {request.user}")
-        
         user = request.user
+        previous = User(pk=user.pk, updated_at=user.updated_at, profile_picture_renditions=user.profile_picture_renditions)
         # Handle simple JSON fields via serializer
         serializer = UserSerializer(user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
-            print("Serializer validation passed")
         else:
-            print(f"Serializer validation failed: {serializer.errors}")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # Handle optional image files
         profile_picture = request.FILES.get('profile_picture')
         if profile_picture and profile_picture.size > 0:
-            print(f"Updating profile picture: {profile_picture}")
             user.profile_picture = profile_picture
-            user.save(update_fields=['profile_picture'])
-            print("Profile picture updated successfully")
+            user.profile_picture_renditions = {}
+            user.save(update_fields=['profile_picture', 'profile_picture_renditions', 'updated_at'])
+            schedule_renditions(user, 'profile_picture', 'profile_picture_renditions')
             
         cover_photo = request.FILES.get('cover_photo')
         if cover_photo and cover_photo.size > 0:
-            print(f"Updating cover photo: {cover_photo}")
             user.cover_photo = cover_photo
-            user.save(update_fields=['cover_photo'])
-            print("Cover photo updated successfully")
+            user.cover_photo_renditions = {}
+            user.save(update_fields=['cover_photo', 'cover_photo_renditions', 'updated_at'])
+            schedule_renditions(user, 'cover_photo', 'cover_photo_renditions')
 
-        return Response(UserSerializer(user, context={'request': request}).data)
+        # Cached author cards are keyed on updated_at; drop the stale one eagerly
+        invalidate_author(previous, {'request': request})
+        return Response(UserSerializer(user, context={'request': request, 'avatar_size': 'feed'}).data)
     except Exception as e:
         print(f"Profile update error: {e}")
         import traceback
@@ -136,6 +138,7 @@ def follow_user(request, user_id):
         else:
             request.user.following.add(target_user)
             action = 'followed'
+            notify(target_user.id, request.user.id, Notification.Verb.FOLLOW)
             
         return Response({
             'message': f'Successfully {action} {target_user.username}',
@@ -173,6 +176,7 @@ def send_connection_request(request, user_id: int):
         # If previously rejected/canceled, reset to pending
         cr.status = ConnectionRequest.Status.PENDING
         cr.save(update_fields=['status'])
+    notify(receiver.id, request.user.id, Notification.Verb.CONNECTION_REQUEST)
     return Response({'message': 'Connection request sent', 'status': 'pending'})
 
 
@@ -218,34 +222,45 @@ def cancel_connection_request(request, user_id: int):
 @permission_classes([IsAuthenticated])
 def list_connection_requests(request):
     """List pending connection requests for current user (received)."""
-    pending = ConnectionRequest.objects.filter(receiver=request.user, status=ConnectionRequest.Status.PENDING)
+    pending = list(
+        ConnectionRequest.objects
+        .filter(receiver=request.user, status=ConnectionRequest.Status.PENDING)
+        .order_by('-created_at')
+    )
+    senders = {
+        u.id: u for u in with_follow_counts(User.objects.filter(id__in=[cr.sender_id for cr in pending]))
+    }
+    context = user_list_context(request, senders.values())
     data = [
         {
             'id': cr.id,
-            'sender': UserSerializer(cr.sender, context={'request': request}).data,
+            'sender': UserSerializer(senders[cr.sender_id], context=context).data,
             'created_at': cr.created_at,
         }
         for cr in pending
     ]
     return Response(data)
 
+def serialize_user_list(request, users):
+    with timed('serializer'):
+        return UserSerializer(users, many=True, context=user_list_context(request, users)).data
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_followers(request, user_id=None):
     """Get followers list"""
     user = request.user if user_id is None else User.objects.get(id=user_id)
-    followers = user.followers.all()
-    serializer = UserSerializer(followers, many=True, context={'request': request})
-    return Response(serializer.data)
+    followers = list(with_follow_counts(user.followers.all()))
+    return Response(serialize_user_list(request, followers))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_following(request, user_id=None):
     """Get following list"""
     user = request.user if user_id is None else User.objects.get(id=user_id)
-    following = user.following.all()
-    serializer = UserSerializer(following, many=True, context={'request': request})
-    return Response(serializer.data)
+    following = list(with_follow_counts(user.following.all()))
+    return Response(serialize_user_list(request, following))
 
 
 @api_view(['GET'])
@@ -253,29 +268,55 @@ def get_following(request, user_id=None):
 def get_connections(request, user_id=None):
     """Get connections list (mutual connections)."""
     user = request.user if user_id is None else User.objects.get(id=user_id)
-    connections = user.connections.all()
-    serializer = UserSerializer(connections, many=True, context={'request': request})
-    return Response(serializer.data)
+    connections = list(with_follow_counts(user.connections.all()))
+    return Response(serialize_user_list(request, connections))
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_suggestions(request):
+    """People you may know, ranked by mutual connections.
+
+    Reads the rows precomputed by ``compute_suggestions``; anyone followed,
+    connected or requested since the last refresh is skipped.
+    """
+    limit = getattr(settings, 'SUGGESTIONS_PAGE_SIZE', 20)
+    suggestions = list(
+        Suggestion.objects.filter(user=request.user)
+        .order_by('-mutual_count', 'candidate_id')
+        .values_list('candidate_id', 'mutual_count')[:limit * 2]
+    )
+    by_id = {u.id: u for u in with_follow_counts(User.objects.filter(id__in=[cid for cid, _ in suggestions]))}
+    users = [by_id[cid] for cid, _ in suggestions if cid in by_id]
+    context = user_list_context(request, users)
+    relationships = context['relationships']
+    data = []
+    with timed('serializer'):
+        for cid, mutual_count in suggestions:
+            if cid not in by_id or cid in relationships.following or cid in relationships.connected or cid in relationships.pending:
+                continue
+            data.append({**UserSerializer(by_id[cid], context=context).data, 'mutual_count': mutual_count})
+            if len(data) >= limit:
+                break
+    return Response(data)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_users(request):
-    """Search users by name, username, bio, or location (excludes self)."""
+    """Search users by name, username, bio, or location (excludes self).
+
+    Uses the full-text index in accounts.search; every term is prefix-matched
+    and people the viewer follows or is connected to rank higher.
+    """
     query = request.query_params.get('q', '').strip()
     if not query:
         return Response([], status=status.HTTP_200_OK)
 
-    qs = User.objects.filter(
-        Q(username__icontains=query)
-        | Q(first_name__icontains=query)
-        | Q(last_name__icontains=query)
-        | Q(bio__icontains=query)
-        | Q(location__icontains=query)
-    ).exclude(id=request.user.id)[:50]
+    ids = search_user_ids(query, viewer=request.user, limit=50)
+    by_id = {u.id: u for u in with_follow_counts(User.objects.filter(id__in=ids))}
+    users = [by_id[i] for i in ids if i in by_id]
 
-    serializer = UserSerializer(qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    return Response(serialize_user_list(request, users))
 
 
 # ---------- Django auth endpoints (session-based) ----------
@@ -1,9 +1,27 @@
 from django.contrib import admin
-from .models import Message
+from .models import Message, Conversation, ConversationParticipant, UnreadCounter
 
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ('id', 'sender', 'receiver', 'message_type', 'created_at')
+    list_display = ('id', 'sender', 'receiver', 'message_type', 'created_at', 'read_at')
     list_filter = ('message_type', 'created_at')
     search_fields = ('sender__email', 'sender__username', 'receiver__email', 'receiver__username', 'text')
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user_low', 'user_high', 'last_activity')
+    raw_id_fields = ('user_low', 'user_high', 'last_message')
+
+
+@admin.register(ConversationParticipant)
+class ConversationParticipantAdmin(admin.ModelAdmin):
+    list_display = ('id', 'conversation', 'user', 'unread_count', 'last_activity')
+    raw_id_fields = ('conversation', 'user')
+
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_count')
+    raw_id_fields = ('user',)
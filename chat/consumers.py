@@ -0,0 +1,72 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .conversations import find_conversation, mark_read
+from .realtime import user_group
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """Per-user chat socket (``/ws/chat/``), authenticated by the session cookie.
+
+    Server -> client events: ``message``, ``typing``, ``read``.
+    Client -> server events:
+    - ``{"type": "typing", "to": <user_id>}``
+    - ``{"type": "read", "with": <user_id>, "up_to": <message_id>}``
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.user_id = user.id
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        kind = content.get('type')
+        try:
+            other_id = int(content.get('to') or content.get('with'))
+        except (TypeError, ValueError):
+            await self.send_json({'event': 'error', 'payload': {'error': 'Missing recipient'}})
+            return
+
+        if kind == 'typing':
+            if await self._has_conversation(other_id):
+                await self._forward(other_id, 'typing', {'from_user': {'id': self.user_id}})
+        elif kind == 'read':
+            try:
+                up_to = int(content['up_to']) if content.get('up_to') is not None else None
+            except (TypeError, ValueError):
+                await self.send_json({'event': 'error', 'payload': {'error': 'up_to must be an integer'}})
+                return
+            if await self._mark_read(other_id, up_to):
+                await self._forward(other_id, 'read', {'by_user': {'id': self.user_id}, 'up_to': up_to})
+        else:
+            await self.send_json({'event': 'error', 'payload': {'error': 'Unknown event type'}})
+
+    async def chat_event(self, event):
+        await self.send_json({'event': event['event'], 'payload': event['payload']})
+
+    async def _forward(self, user_id, event_type, payload):
+        await self.channel_layer.group_send(user_group(user_id), {
+            'type': 'chat.event',
+            'event': event_type,
+            'payload': payload,
+        })
+
+    @database_sync_to_async
+    def _has_conversation(self, other_id):
+        return find_conversation(self.user_id, other_id) is not None
+
+    @database_sync_to_async
+    def _mark_read(self, other_id, up_to):
+        conversation = find_conversation(self.user_id, other_id)
+        if conversation is None:
+            return False
+        return mark_read(conversation, self.user_id, up_to) > 0
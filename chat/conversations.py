@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from main.counters import bump_counter
+from .models import Conversation, ConversationParticipant, Message, UnreadCounter
+
+
+def canonical_pair(a_id, b_id):
+    return (a_id, b_id) if a_id <= b_id else (b_id, a_id)
+
+
+def get_or_create_conversation(a_id, b_id):
+    """Return the conversation between two users, creating it with both participants."""
+    low, high = canonical_pair(a_id, b_id)
+    conversation, created = Conversation.objects.get_or_create(user_low_id=low, user_high_id=high)
+    if created:
+        ConversationParticipant.objects.bulk_create(
+            [ConversationParticipant(conversation=conversation, user_id=uid) for uid in {low, high}],
+            ignore_conflicts=True,
+        )
+    return conversation
+
+
+def pair_messages(a_id, b_id):
+    """Messages between two users in either direction: one range of chat_message_pair_id_idx."""
+    low, high = canonical_pair(a_id, b_id)
+    return Message.objects.filter(user_low_id=low, user_high_id=high)
+
+
+def find_conversation(a_id, b_id):
+    low, high = canonical_pair(a_id, b_id)
+    return Conversation.objects.filter(user_low_id=low, user_high_id=high).first()
+
+
+def record_message(conversation, message):
+    """Bump the conversation's last message/activity and the receiver's unread counts."""
+    with transaction.atomic():
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message=message, last_activity=message.created_at,
+        )
+        ConversationParticipant.objects.filter(conversation=conversation).update(last_activity=message.created_at)
+        ConversationParticipant.objects.filter(
+            conversation=conversation, user_id=message.receiver_id
+        ).update(unread_count=F('unread_count') + 1)
+        bump_counter(UnreadCounter, message.receiver_id, 1)
+
+
+def mark_read(conversation, user_id, up_to_id=None):
+    """Mark messages to ``user_id`` read (all, or ids <= ``up_to_id``) with one
+    UPDATE and take the marked number off the thread and total counters."""
+    with transaction.atomic():
+        qs = Message.objects.filter(conversation=conversation, receiver_id=user_id, read_at__isnull=True)
+        if up_to_id is not None:
+            qs = qs.filter(id__lte=up_to_id)
+        marked = qs.update(read_at=timezone.now())
+        if marked:
+            ConversationParticipant.objects.filter(
+                conversation=conversation, user_id=user_id
+            ).update(unread_count=F('unread_count') - marked)
+            bump_counter(UnreadCounter, user_id, -marked)
+    return marked
+
+
+def unread_counts(user_id):
+    """``(total, {counterpart_id: unread})`` for a user's unread badges."""
+    total = (
+        UnreadCounter.objects.filter(user_id=user_id)
+        .values_list('unread_count', flat=True).first()
+    ) or 0
+    threads = {}
+    if total:
+        for low, high, n in (
+            ConversationParticipant.objects.filter(user_id=user_id, unread_count__gt=0)
+            .values_list('conversation__user_low_id', 'conversation__user_high_id', 'unread_count')
+        ):
+            threads[high if low == user_id else low] = n
+    return total, threads
+
+
+def recount_unread(user_ids=None):
+    """Rebuild the per-thread and total unread counters from the unread
+    messages; returns the number of totals updated."""
+    unread = (
+        Message.objects.filter(conversation=OuterRef('conversation'), receiver=OuterRef('user'), read_at__isnull=True)
+        .order_by().values('conversation').annotate(c=Count('*')).values('c')
+    )
+    total = (
+        ConversationParticipant.objects.filter(user=OuterRef('user'))
+        .order_by().values('user').annotate(s=Sum('unread_count')).values('s')
+    )
+    participants = ConversationParticipant.objects.all()
+    counters = UnreadCounter.objects.all()
+    if user_ids:
+        participants = participants.filter(user_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        participants.update(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
+        return counters.update(unread_count=Coalesce(Subquery(total, output_field=IntegerField()), Value(0)))
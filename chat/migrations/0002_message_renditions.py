@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.models import Max
+
+BATCH_SIZE = 2000
+
+
+def backfill_conversations(apps, schema_editor):
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationParticipant = apps.get_model('chat', 'ConversationParticipant')
+    Message = apps.get_model('chat', 'Message')
+
+    conversations = {}
+    last_id = 0
+    while True:
+        batch = list(
+            Message.objects.filter(id__gt=last_id, conversation__isnull=True)
+            .order_by('id')
+            .only('id', 'sender_id', 'receiver_id')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for m in batch:
+            pair = (min(m.sender_id, m.receiver_id), max(m.sender_id, m.receiver_id))
+            if pair not in conversations:
+                conversations[pair], _ = Conversation.objects.get_or_create(user_low_id=pair[0], user_high_id=pair[1])
+            m.conversation_id = conversations[pair].id
+        Message.objects.bulk_update(batch, ['conversation'])
+        last_id = batch[-1].id
+
+    for conversation in conversations.values():
+        last_message_id = Message.objects.filter(conversation_id=conversation.id).aggregate(m=Max('id'))['m']
+        last_message = Message.objects.get(id=last_message_id)
+        Conversation.objects.filter(id=conversation.id).update(
+            last_message_id=last_message_id, last_activity=last_message.created_at,
+        )
+        ConversationParticipant.objects.bulk_create(
+            [
+                ConversationParticipant(conversation_id=conversation.id, user_id=user_id, last_activity=last_message.created_at)
+                for user_id in {conversation.user_low_id, conversation.user_high_id}
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversation'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+BATCH_SIZE = 2000
+
+
+def backfill_read_state(apps, schema_editor):
+    """Existing messages count as read, except the latest ``unread_count``
+    received in each thread; per-user totals are summed from the threads."""
+    Message = apps.get_model('chat', 'Message')
+    ConversationParticipant = apps.get_model('chat', 'ConversationParticipant')
+    UnreadCounter = apps.get_model('chat', 'UnreadCounter')
+
+    max_id = Message.objects.aggregate(m=Max('id'))['m'] or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        Message.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE).update(read_at=F('created_at'))
+
+    totals = {}
+    for p in ConversationParticipant.objects.filter(unread_count__gt=0).iterator():
+        unread_ids = list(
+            Message.objects.filter(conversation_id=p.conversation_id, receiver_id=p.user_id)
+            .order_by('-id').values_list('id', flat=True)[:p.unread_count]
+        )
+        Message.objects.filter(id__in=unread_ids).update(read_at=None)
+        if len(unread_ids) != p.unread_count:
+            ConversationParticipant.objects.filter(pk=p.pk).update(unread_count=len(unread_ids))
+        totals[p.user_id] = totals.get(p.user_id, 0) + len(unread_ids)
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=uid, unread_count=n) for uid, n in totals.items() if n],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_suggestions'),
+        ('chat', '0004_backfill_conversations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='chat_unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_read_state, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(condition=models.Q(('unread_count__gt', 0)), fields=['user'], name='chat_participant_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('read_at__isnull', True)), fields=['conversation', 'receiver', 'id'], name='chat_message_unread_idx'),
+        ),
+    ]
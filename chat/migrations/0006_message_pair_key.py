@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, Max, When
+
+BATCH_SIZE = 5000
+
+
+def backfill_pair_key(apps, schema_editor):
+    """Fill user_low/user_high from sender/receiver, one id range per UPDATE."""
+    Message = apps.get_model('chat', 'Message')
+    max_id = Message.objects.aggregate(m=Max('id'))['m'] or 0
+    for start in range(0, max_id, BATCH_SIZE):
+        Message.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE).update(
+            user_low_id=Case(When(sender_id__lte=F('receiver_id'), then=F('sender_id')), default=F('receiver_id')),
+            user_high_id=Case(When(sender_id__lte=F('receiver_id'), then=F('receiver_id')), default=F('sender_id')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_message_read_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='user_low',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='user_high',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_pair_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='user_low',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='user_high',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveIndex(
+            model_name='message',
+            name='chat_messag_sender__078476_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='message',
+            name='chat_message_conv_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['user_low', 'user_high', 'id'], name='chat_message_pair_id_idx'),
+        ),
+    ]
@@ -1,27 +1,86 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 
 
+class Conversation(models.Model):
+    """Two-party thread. The pair is stored in canonical order (low id, high id)."""
+    user_low = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user_low', 'user_high')
+
+    def __str__(self) -> str:
+        return f"Conversation({self.user_low_id}, {self.user_high_id})"
+
+
+class ConversationParticipant(models.Model):
+    """Per-user view of a conversation; ``last_activity`` is copied here so
+    a user's thread list is served by the (user, last_activity) index."""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversation_memberships')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('conversation', 'user')
+        indexes = [
+            models.Index(fields=['user', '-last_activity'], name='chat_participant_recent_idx'),
+            # Only threads with unread messages, for badge polling
+            models.Index(
+                fields=['user'], condition=models.Q(unread_count__gt=0), name='chat_participant_unread_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"ConversationParticipant({self.user_id} in {self.conversation_id})"
+
+
 class Message(models.Model):
     class MessageType(models.TextChoices):
         TEXT = 'text', 'Text'
         IMAGE = 'image', 'Image'
 
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='messages')
     sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sent_messages')
     receiver = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='received_messages')
+    # Unordered pair key (canonical_pair of sender and receiver), so two-party
+    # history is one range of chat_message_pair_id_idx in either direction.
+    # user_low needs no index of its own, it leads the pair index.
+    user_low = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', db_index=False)
+    user_high = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
     text = models.TextField(blank=True)
     message_type = models.CharField(max_length=10, choices=MessageType.choices, default=MessageType.TEXT)
     media = models.ImageField(upload_to='messages/', blank=True, null=True,
                               validators=[FileExtensionValidator(allowed_extensions=['jpg','jpeg','png','gif'])])
+    renditions = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         indexes = [
-            models.Index(fields=['sender', 'receiver', 'created_at'])
+            # History between two users, newest or oldest first, keyset on id
+            models.Index(fields=['user_low', 'user_high', 'id'], name='chat_message_pair_id_idx'),
+            # Unread messages only: what "mark read up to id" updates
+            models.Index(
+                fields=['conversation', 'receiver', 'id'], condition=models.Q(read_at__isnull=True),
+                name='chat_message_unread_idx',
+            ),
         ]
 
     def __str__(self) -> str:
         return f"Message({self.sender_id} -> {self.receiver_id}, {self.message_type})"
 
-# Create your models here.
+
+class UnreadCounter(models.Model):
+    """Denormalized total of a user's unread messages, read with a single primary-key lookup."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='chat_unread_counter')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"UnreadCounter({self.user_id}: {self.unread_count})"
@@ -0,0 +1,42 @@
+"""
+Publishing chat events to connected WebSocket clients.
+
+Every authenticated socket joins its user's group; views publish to the
+groups of the users an event concerns. The channel layer is in-memory on a
+single node and Redis-backed when ``REDIS_URL`` is set (see CHANNEL_LAYERS).
+"""
+
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    return f"chat.user.{user_id}"
+
+
+def publish(user_ids, event_type, payload):
+    """Send ``payload`` as a ``event_type`` event to every socket of ``user_ids``.
+
+    Delivery is best effort: a broker outage must not fail the request that
+    already committed the message, clients catch up with ``since_id``.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    # Channel layers only carry plain JSON/msgpack types (no datetimes)
+    payload = json.loads(json.dumps(payload, cls=JSONEncoder))
+    for user_id in set(user_ids):
+        try:
+            async_to_sync(layer.group_send)(user_group(user_id), {
+                'type': 'chat.event',
+                'event': event_type,
+                'payload': payload,
+            })
+        except Exception:
+            logger.exception("Failed to publish %s to user %s", event_type, user_id)
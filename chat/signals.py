@@ -0,0 +1,16 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from main.counters import bump_counter
+from .models import Conversation, ConversationParticipant, UnreadCounter
+
+
+@receiver(pre_delete, sender=Conversation)
+def forget_conversation_unread(sender, instance, **kwargs):
+    """A conversation goes when either user is deleted; take its unread
+    messages off the other participant's total."""
+    for user_id, n in (
+        ConversationParticipant.objects.filter(conversation=instance, unread_count__gt=0)
+        .values_list('user_id', 'unread_count')
+    ):
+        bump_counter(UnreadCounter, user_id, -n)
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import asyncio
+import io
 
-# Create your tests here.
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from accounts.models import User
+from main.asgi import application
+from main.testing import QueryBudgetMixin, QueryPlanMixin
+from .conversations import get_or_create_conversation, pair_messages
+from .models import ConversationParticipant, Message, UnreadCounter
+
+
+class UnreadCounterTests(QueryBudgetMixin, TestCase):
+    """Unread counters follow sends and "mark read up to id" exactly."""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('alice', 'bob', 'carol')
+        ]
+
+    def send(self, sender, receiver, text):
+        self.client.force_login(sender)
+        response = self.client.post(f'/api/chat/{receiver.pk}/send/', {'text': text})
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def unread(self, user):
+        self.client.force_login(user)
+        response = self.client.get('/api/chat/unread/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_counts_per_thread_and_total(self):
+        first = self.send(self.bob, self.alice, 'one')
+        self.send(self.bob, self.alice, 'two')
+        self.send(self.carol, self.alice, 'three')
+        self.send(self.alice, self.bob, 'reply')
+        data = self.unread(self.alice).json()
+        self.assertEqual(data['messages'], 3)
+        self.assertEqual(data['threads'], {str(self.bob.pk): 2, str(self.carol.pk): 1})
+
+        response = self.client.post(f'/api/chat/{self.bob.pk}/read/', {'up_to': first})
+        self.assertEqual(response.json(), {'marked': 1})
+        # Marking the same range again changes nothing
+        response = self.client.post(f'/api/chat/{self.bob.pk}/read/', {'up_to': first})
+        self.assertEqual(response.json(), {'marked': 0})
+        self.assertIsNotNone(Message.objects.get(pk=first).read_at)
+        data = self.unread(self.alice).json()
+        self.assertEqual(data['messages'], 2)
+        self.assertEqual(data['threads'], {str(self.bob.pk): 1, str(self.carol.pk): 1})
+
+    def test_reading_latest_page_marks_thread_read(self):
+        self.send(self.bob, self.alice, 'one')
+        self.send(self.bob, self.alice, 'two')
+        self.client.force_login(self.alice)
+        self.client.get(f'/api/chat/{self.bob.pk}/')
+        data = self.unread(self.alice).json()
+        self.assertEqual((data['messages'], data['threads']), (0, {}))
+        self.assertFalse(Message.objects.filter(receiver=self.alice, read_at__isnull=True).exists())
+
+    def test_badge_poll_budget(self):
+        # Session, user, message counter and notification counter
+        self.assertQueryBudget(self.unread(self.alice), 4)
+        self.send(self.bob, self.alice, 'one')
+        self.assertQueryBudget(self.unread(self.alice), 5)
+
+    def test_deleted_counterpart_leaves_the_badge(self):
+        self.send(self.bob, self.alice, 'one')
+        self.send(self.bob, self.alice, 'two')
+        self.send(self.carol, self.alice, 'three')
+        self.bob.delete()
+        data = self.unread(self.alice).json()
+        self.assertEqual((data['messages'], data['threads']), (1, {str(self.carol.pk): 1}))
+
+    def test_recount_repairs_drifted_counters(self):
+        self.send(self.bob, self.alice, 'one')
+        UnreadCounter.objects.filter(user=self.alice).update(unread_count=7)
+        ConversationParticipant.objects.filter(user=self.alice).update(unread_count=3)
+        call_command('recount_unread_counters', stdout=io.StringIO())
+        data = self.unread(self.alice).json()
+        self.assertEqual((data['messages'], data['threads']), (1, {str(self.bob.pk): 1}))
+
+
+class MessageQueryPlanTests(QueryPlanMixin, TestCase):
+    """Two-party history pages are index range scans in id order, never sorts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('alice', 'bob')
+        ]
+
+    def test_latest_page(self):
+        self.assertIndexScan(pair_messages(self.bob.pk, self.alice.pk).order_by('-id')[:50], 'chat_message_pair_id_idx')
+
+    def test_scrollback_page(self):
+        qs = pair_messages(self.alice.pk, self.bob.pk).filter(id__lt=1000).order_by('-id')[:50]
+        self.assertIndexScan(qs, 'chat_message_pair_id_idx')
+
+    def test_since_id_poll(self):
+        qs = pair_messages(self.alice.pk, self.bob.pk).filter(id__gt=10).order_by('id')[:50]
+        self.assertIndexScan(qs, 'chat_message_pair_id_idx')
+
+    def test_id_scan_is_index_only(self):
+        plan = self.assertIndexScan(
+            pair_messages(self.alice.pk, self.bob.pk).filter(id__gt=10).order_by('id').values_list('id', flat=True),
+            'chat_message_pair_id_idx',
+        )
+        self.assertTrue('COVERING INDEX' in plan or 'Index Only Scan' in plan, plan)
+
+
+class ChatSocketTests(TransactionTestCase):
+    """The socket only accepts trusted origins and only talks to chat partners."""
+
+    def setUp(self):
+        self.alice, self.bob, self.mallory = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('alice', 'bob', 'mallory')
+        ]
+        get_or_create_conversation(self.alice.pk, self.bob.pk)
+
+    def headers(self, user, origin):
+        self.client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        return [(b'origin', origin.encode()), (b'cookie', cookie.encode())]
+
+    async def connect(self, user, origin='http://localhost:3000'):
+        headers = await asyncio.to_thread(self.headers, user, origin)
+        communicator = WebsocketCommunicator(application, '/ws/chat/', headers=headers)
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_foreign_origin_is_rejected(self):
+        communicator, connected = await self.connect(self.alice, origin='https://evil.example')
+        self.assertFalse(connected)
+        await communicator.disconnect()
+
+    async def test_typing_only_reaches_chat_partners(self):
+        alice, connected = await self.connect(self.alice)
+        self.assertTrue(connected)
+        bob, _ = await self.connect(self.bob)
+        mallory, _ = await self.connect(self.mallory)
+
+        await mallory.send_json_to({'type': 'typing', 'to': self.alice.pk})
+        self.assertTrue(await alice.receive_nothing())
+
+        await bob.send_json_to({'type': 'typing', 'to': self.alice.pk})
+        event = await alice.receive_json_from()
+        self.assertEqual(event, {'event': 'typing', 'payload': {'from_user': {'id': self.bob.pk}}})
+        for communicator in (alice, bob, mallory):
+            await communicator.disconnect()
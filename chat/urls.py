@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path('<int:user_id>/', views.list_messages, name='list-messages'),
     path('<int:user_id>/send/', views.send_message, name='send-message'),
+    path('<int:user_id>/read/', views.mark_messages_read, name='mark-messages-read'),
+    path('unread/', views.get_unread_counts, name='unread-counts'),
     path('recent/', views.list_recent_threads, name='list-recent-threads'),
 ]
@@ -3,38 +3,122 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Message
+from django.db import transaction
+from .models import Message, ConversationParticipant
+from .conversations import (
+    find_conversation, get_or_create_conversation, mark_read, pair_messages, record_message, unread_counts,
+)
+from .realtime import publish
+from main.instrumentation import timed
+from notifications.services import unread_count as notification_unread_count
+from main.pagination import get_page_size
+from main.renditions import rendition_url, schedule_renditions
+
+
+@timed('serializer')
+def serialize_message(request, m):
+    return {
+        'id': m.id,
+        'from_user': {'id': m.sender_id},
+        'to_user': {'id': m.receiver_id},
+        'text': m.text,
+        'message_type': m.message_type,
+        'media_url': (request.build_absolute_uri(rendition_url(m.media, m.renditions, 'feed')) if m.media else None),
+        'created_at': m.created_at,
+        'read_at': m.read_at,
+    }
+
+
+def _int_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    return int(value)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_messages(request, user_id: int):
-    """List messages between current user and another user (most recent first)."""
+    """List messages between current user and another user (oldest first).
+
+    Query params (mutually exclusive):
+    - ``since_id``: only messages newer than this id (incremental polling)
+    - ``before_id``: the page of messages just older than this id (scrollback)
+    Without either, the most recent page is returned. ``page_size`` sets the
+    page length (capped at CHAT_MAX_PAGE_SIZE).
+    """
     User = get_user_model()
     try:
         other = User.objects.get(id=user_id)
     except User.DoesNotExist:
         return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-    qs = Message.objects.filter(
-        sender=request.user, receiver=other
-    ).union(
-        Message.objects.filter(sender=other, receiver=request.user)
-    ).order_by('created_at')
-    data = [
-        {
-            'id': m.id,
-            'from_user': {'id': m.sender_id},
-            'to_user': {'id': m.receiver_id},
-            'text': m.text,
-            'message_type': m.message_type,
-            'media_url': (request.build_absolute_uri(m.media.url) if m.media else None),
-            'created_at': m.created_at,
-        }
-        for m in qs
-    ]
-    return Response(data)
+    try:
+        since_id = _int_param(request, 'since_id')
+        before_id = _int_param(request, 'before_id')
+    except ValueError:
+        return Response({'error': 'since_id and before_id must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = get_page_size(
+        request,
+        getattr(settings, 'CHAT_PAGE_SIZE', 50),
+        getattr(settings, 'CHAT_MAX_PAGE_SIZE', 200),
+    )
+
+    qs = pair_messages(request.user.id, other.id)
+    if since_id is not None:
+        messages = list(qs.filter(id__gt=since_id).order_by('id')[:limit])
+    else:
+        if before_id is not None:
+            qs = qs.filter(id__lt=before_id)
+        messages = list(qs.order_by('-id')[:limit])[::-1]
+        if before_id is None and messages:
+            # Fetching the latest page marks the conversation as read
+            _mark_read_and_publish(messages[-1].conversation_id, request.user.id, other.id, messages[-1].id)
+    return Response([serialize_message(request, m) for m in messages])
+
+
+def _mark_read_and_publish(conversation, user_id, other_id, up_to_id):
+    marked = mark_read(conversation, user_id, up_to_id)
+    if marked:
+        payload = {'by_user': {'id': user_id}, 'up_to': up_to_id}
+        transaction.on_commit(lambda: publish([other_id], 'read', payload))
+    return marked
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_messages_read(request, user_id: int):
+    """Mark messages from a user read, all or those with id <= ``up_to``.
+
+    The sender gets a ``read`` event (read receipt) when anything changed.
+    """
+    up_to = request.data.get('up_to')
+    if up_to not in (None, ''):
+        try:
+            up_to = int(up_to)
+        except (TypeError, ValueError):
+            return Response({'error': 'up_to must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        up_to = None
+    conversation = find_conversation(request.user.id, user_id)
+    if conversation is None:
+        return Response({'marked': 0})
+    marked = _mark_read_and_publish(conversation, request.user.id, user_id, up_to)
+    return Response({'marked': marked})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unread_counts(request):
+    """All unread badges at once: total, per thread (keyed by counterpart id)
+    and notifications. Nothing unread costs two primary-key lookups."""
+    total, threads = unread_counts(request.user.id)
+    return Response({
+        'messages': total,
+        'threads': {str(uid): n for uid, n in threads.items()},
+        'notifications': notification_unread_count(request.user.id),
+    })
 
 
 @api_view(['POST'])
@@ -54,24 +138,25 @@ def send_message(request, user_id: int):
     if not text and not file:
         return Response({'error': 'Provide text or image'}, status=status.HTTP_400_BAD_REQUEST)
 
-    msg = Message(sender=request.user, receiver=other)
+    conversation = get_or_create_conversation(request.user.id, other.id)
+    msg = Message(
+        conversation=conversation, sender=request.user, receiver=other,
+        user_low_id=conversation.user_low_id, user_high_id=conversation.user_high_id,
+    )
     if file:
         msg.message_type = Message.MessageType.IMAGE
         msg.media = file
     else:
         msg.message_type = Message.MessageType.TEXT
         msg.text = text
-    msg.save()
+    with transaction.atomic():
+        msg.save()
+        record_message(conversation, msg)
+    schedule_renditions(msg, 'media', 'renditions')
 
-    return Response({
-        'id': msg.id,
-        'from_user': {'id': msg.sender_id},
-        'to_user': {'id': msg.receiver_id},
-        'text': msg.text,
-        'message_type': msg.message_type,
-        'media_url': (request.build_absolute_uri(msg.media.url) if msg.media else None),
-        'created_at': msg.created_at,
-    }, status=status.HTTP_201_CREATED)
+    data = serialize_message(request, msg)
+    transaction.on_commit(lambda: publish([msg.sender_id, msg.receiver_id], 'message', data))
+    return Response(data, status=status.HTTP_201_CREATED)
 
 
 @api_view(['GET'])
@@ -79,43 +164,47 @@ def send_message(request, user_id: int):
 def list_recent_threads(request):
     """Return latest message per counterpart for current user (most recent first)."""
     user = request.user
-    qs = (
-        Message.objects
-        .filter(Q(sender=user) | Q(receiver=user))
-        .select_related('sender', 'receiver')
-        .order_by('-created_at')
+    memberships = (
+        ConversationParticipant.objects
+        .filter(user=user, conversation__last_message__isnull=False)
+        .select_related(
+            'conversation__last_message',
+            'conversation__user_low',
+            'conversation__user_high',
+        )
+        .order_by('-last_activity')[:10]
     )
-    threads = {}
-    results = []
 
-    def file_url(f):
+    def file_url(f, renditions=None, size='thumb'):
         if not f:
             return None
         try:
-            url = f.url
+            url = rendition_url(f, renditions, size)
         except Exception:
             return None
         return request.build_absolute_uri(url)
 
-    for m in qs[:200]:
-        counterpart = m.receiver if m.sender_id == user.id else m.sender
-        if counterpart.id in threads:
-            continue
-        threads[counterpart.id] = True
+    results = []
+    for membership in memberships:
+        conversation = membership.conversation
+        m = conversation.last_message
+        counterpart = conversation.user_high if conversation.user_low_id == user.id else conversation.user_low
         results.append({
             'counterpart': {
                 'id': counterpart.id,
                 'username': counterpart.username,
                 'first_name': getattr(counterpart, 'first_name', ''),
                 'last_name': getattr(counterpart, 'last_name', ''),
-                'profile_picture': file_url(getattr(counterpart, 'profile_picture', None)),
+                'profile_picture': file_url(
+                    getattr(counterpart, 'profile_picture', None),
+                    getattr(counterpart, 'profile_picture_renditions', None),
+                ),
             },
             'text': m.text,
             'message_type': m.message_type,
-            'media_url': file_url(getattr(m, 'media', None)),
+            'media_url': file_url(getattr(m, 'media', None), m.renditions, 'feed'),
             'created_at': m.created_at,
+            'unread_count': membership.unread_count,
         })
-        if len(results) >= 10:
-            break
 
     return Response(results)
@@ -0,0 +1,22 @@
+"""
+Per-user counter rows (unread notifications, unread messages) shared by apps.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def bump_counter(model, user_id, delta):
+    """Add ``delta`` to ``user_id``'s ``unread_count`` row in ``model``, creating it on first use.
+
+    The row is created lazily by the first increment; a concurrent first
+    bump that wins the insert makes ours fall back to the UPDATE. A decrement
+    never creates a row (a missing row already reads as zero).
+    """
+    updated = model.objects.filter(user_id=user_id).update(unread_count=F('unread_count') + delta)
+    if not updated and delta > 0:
+        try:
+            with transaction.atomic():
+                model.objects.create(user_id=user_id, unread_count=delta)
+        except IntegrityError:
+            model.objects.filter(user_id=user_id).update(unread_count=F('unread_count') + delta)
@@ -0,0 +1,117 @@
+"""
+Per-request query and latency instrumentation.
+
+``RequestMetricsMiddleware`` records, for every request:
+
+- the number of SQL statements and the time spent in them (through a
+  ``connection.execute_wrapper`` on every configured database),
+- time spent serializing, accumulated by code wrapped in ``timed('serializer')``,
+- total latency.
+
+The numbers are logged as one JSON line on the ``main.instrumentation``
+logger, attached to the response as ``response.request_metrics`` (read by
+``main.testing``), and emitted as a ``Server-Timing`` header when
+``SERVER_TIMING_HEADER`` is enabled.
+"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+@dataclass
+class RequestMetrics:
+    sql_count: int = 0
+    sql_time: float = 0.0
+    timings: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    total_time: float = 0.0
+
+    def as_dict(self):
+        data = {
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+        for name, seconds in self.timings.items():
+            data[f'{name}_ms'] = round(seconds * 1000, 2)
+        return data
+
+    def server_timing(self):
+        parts = [f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"']
+        parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.timings.items()]
+        parts.append(f'total;dur={self.total_time * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def current_metrics():
+    """Metrics of the request being handled, or ``None`` outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the wall time of the block to the current request's ``name`` timing."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _sql_wrapper(metrics):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.sql_count += 1
+            metrics.sql_time += time.perf_counter() - start
+    return wrapper
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                wrapper = _sql_wrapper(metrics)
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(wrapper))
+                response = self.get_response(request)
+                # Lazily rendered responses (DRF) serialize here, inside the window
+                if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                    response.render()
+        finally:
+            _current.reset(token)
+        metrics.total_time = time.perf_counter() - metrics.started
+
+        response.request_metrics = metrics
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = metrics.server_timing()
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }))
+        return response
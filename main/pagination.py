@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) pagination helpers shared by the API views.
+
+A cursor is an opaque, URL-safe token holding the ordering values of the
+last row on a page. The next page is fetched with a range filter on those
+values instead of an OFFSET, so page N costs the same as page 1 as long as
+the ordering is backed by an index.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Encode a list of ordering values into an opaque cursor string."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_raw_cursor(token, length):
+    """Decode a cursor into its raw JSON values (for orderings not on model fields)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if not isinstance(payload, list) or len(payload) != length:
+        raise InvalidCursor('Invalid cursor')
+    return payload
+
+
+def decode_cursor(token, model, ordering):
+    """Decode a cursor back into python values typed by the model fields."""
+    payload = decode_raw_cursor(token, len(ordering))
+    values = []
+    for name, raw in zip(ordering, payload):
+        field = model._meta.get_field(name.lstrip('-'))
+        try:
+            values.append(field.to_python(raw))
+        except Exception as e:
+            raise InvalidCursor('Invalid cursor') from e
+    return values
+
+
+def keyset_filter(ordering, values):
+    """Build the "rows after this cursor" filter for a lexicographic ordering.
+
+    For ordering (a, b, c) this is: a > va OR (a = va AND b > vb) OR ...
+    with the comparison flipped for descending fields.
+    """
+    condition = Q()
+    for i, name in enumerate(ordering):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        term = Q(**{f'{field}__{lookup}': values[i]})
+        for prev_name, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_name.lstrip('-'): prev_value})
+        condition |= term
+    return condition
+
+
+def get_page_size(request, default, maximum):
+    """Read ``page_size`` from the query string, clamped to [1, maximum]."""
+    try:
+        size = int(request.query_params.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def paginate_keyset(queryset, ordering, cursor=None, page_size=20):
+    """Return ``(rows, next_cursor)`` for one page of ``queryset``.
+
+    ``ordering`` must end with a unique field (normally ``-id``) so the
+    cursor position is unambiguous. Raises ``InvalidCursor`` on a bad token.
+    """
+    qs = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        qs = qs.filter(keyset_filter(ordering, values))
+    # Fetch one extra row to know whether a next page exists
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name.lstrip('-')) for name in ordering])
+    return rows, next_cursor
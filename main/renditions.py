@@ -0,0 +1,95 @@
+"""
+Image renditions (thumbnail / feed / full) generated with Pillow.
+
+Originals are kept untouched; each rendition is a resized, re-encoded WebP
+written next to it in storage without EXIF or other metadata. Rendition
+storage names are recorded on the model in a JSON field so serializers can
+pick a size per context and fall back to the original until processing
+has finished.
+"""
+
+import io
+import logging
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENDITION_SIZES = {'thumb': 160, 'feed': 720, 'full': 1600}
+
+
+def rendition_sizes():
+    return getattr(settings, 'IMAGE_RENDITION_SIZES', DEFAULT_RENDITION_SIZES)
+
+
+def rendition_url(field_file, renditions, size):
+    """Storage URL of ``size`` for ``field_file``, or the original's URL."""
+    name = (renditions or {}).get(size)
+    if name:
+        return field_file.storage.url(name)
+    return field_file.url
+
+
+def render(source, max_side):
+    """Return WebP bytes of ``source`` scaled to fit ``max_side``, metadata stripped."""
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        out = io.BytesIO()
+        # A fresh image has no info dict, so no EXIF/ICC/XMP is carried over
+        clean = Image.new(img.mode, img.size)
+        clean.paste(img)
+        clean.save(out, format='WEBP', quality=getattr(settings, 'IMAGE_RENDITION_QUALITY', 80), method=4)
+        return out.getvalue()
+
+
+def generate_renditions(field_file):
+    """Write every configured rendition of ``field_file`` and return ``{size: name}``."""
+    storage = field_file.storage
+    stem, _ = os.path.splitext(field_file.name)
+    names = {}
+    for size, max_side in rendition_sizes().items():
+        field_file.open('rb')
+        try:
+            data = render(field_file, max_side)
+        finally:
+            field_file.close()
+        names[size] = storage.save(f"{stem}_{size}.webp", ContentFile(data))
+    return names
+
+
+def process_renditions(model_label, pk, field_name, renditions_field):
+    """Background task: render ``field_name`` of one row and record the names.
+
+    ``updated_at`` is left alone: the serializer cache (posts.cache) keys on
+    whether renditions are recorded, so it picks up the new URLs by itself.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return
+    try:
+        names = generate_renditions(field_file)
+    except Exception:
+        logger.exception("Rendition processing failed for %s %s.%s", model_label, pk, field_name)
+        return
+    # Only record the result if the original has not been replaced meanwhile
+    model.objects.filter(pk=pk, **{field_name: field_file.name}).update(**{renditions_field: names})
+
+
+def schedule_renditions(instance, field_name, renditions_field):
+    """Queue rendition processing for ``instance.<field_name>`` after commit."""
+    if not getattr(instance, field_name):
+        return
+    enqueue(process_renditions, instance._meta.label, instance.pk, field_name, renditions_field)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 from decouple import config
@@ -39,9 +40,11 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'chat',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'main.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -152,6 +155,28 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'main.wsgi.application'
+ASGI_APPLICATION = 'main.asgi.application'
+
+# Origins allowed to open chat WebSockets. Sockets authenticate with the
+# session cookie (SameSite=None in production), so this must never be "*".
+WEBSOCKET_ALLOWED_ORIGINS = [
+    origin.strip() for origin in os.getenv('WEBSOCKET_ALLOWED_ORIGINS', '').split(',') if origin.strip()
+] or CORS_ALLOWED_ORIGINS
+
+# Channel layer for chat WebSockets: in-process on a single node, Redis for multi-node
+if os.getenv('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.getenv('REDIS_URL')]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
 
 
 # Database
@@ -163,6 +188,15 @@ if DEBUG:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'timeout': 20,
+            },
+            # File-backed test database: the in-memory one uses shared-cache
+            # table locks, which fail immediately under concurrent writers.
+            # Kept in the temp dir, out of the source tree
+            'TEST': {
+                'NAME': Path(tempfile.gettempdir()) / 'horizonix_test_db.sqlite3',
+            },
         }
     }
 else:
@@ -273,6 +307,114 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache: Redis or memcached in production, local memory otherwise
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Serialized post / author card cache
+SERIALIZER_CACHE_TIMEOUT = int(os.getenv('SERIALIZER_CACHE_TIMEOUT', '3600'))
+SERIALIZER_CACHE_VERSION = 1
+
+# Cached follow/connection adjacency lists (accounts.graph); invalidated by
+# version bumps on every graph change, the timeout only bounds memory
+GRAPH_CACHE_TIMEOUT = int(os.getenv('GRAPH_CACHE_TIMEOUT', '3600'))
+
+# "People you may know" (accounts.suggestions): top-K stored per user;
+# neighbours with more neighbours than the hub degree are not walked through
+SUGGESTIONS_TOP_K = int(os.getenv('SUGGESTIONS_TOP_K', '50'))
+SUGGESTIONS_HUB_DEGREE = int(os.getenv('SUGGESTIONS_HUB_DEGREE', '1000'))
+SUGGESTIONS_PAGE_SIZE = int(os.getenv('SUGGESTIONS_PAGE_SIZE', '20'))
+
+# Feed pagination (keyset cursor)
+FEED_PAGE_SIZE = int(os.getenv('FEED_PAGE_SIZE', '20'))
+FEED_MAX_PAGE_SIZE = int(os.getenv('FEED_MAX_PAGE_SIZE', '100'))
+
+# Home timeline fan-out: authors above this follower count are merged on read
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.getenv('TIMELINE_FANOUT_MAX_FOLLOWERS', '5000'))
+TIMELINE_FANOUT_BATCH_SIZE = int(os.getenv('TIMELINE_FANOUT_BATCH_SIZE', '1000'))
+
+# User search ranking
+USER_SEARCH_GRAPH_BOOST = float(os.getenv('USER_SEARCH_GRAPH_BOOST', '1.0'))
+USER_SEARCH_CANDIDATES = int(os.getenv('USER_SEARCH_CANDIDATES', '200'))
+
+# Ranked feed (posts.ranking): scorer selectable per request with ?rank=
+FEED_SCORER = os.getenv('FEED_SCORER', 'engagement')
+FEED_SCORERS = {
+    'recency': 'posts.ranking.RecencyScorer',
+    'engagement': 'posts.ranking.EngagementScorer',
+}
+FEED_RANK_WINDOW_HOURS = 72
+FEED_RANK_MAX_CANDIDATES = 500
+FEED_RANK_HALF_LIFE_HOURS = 12
+
+# Post/comment search: relevance decays with this half-life
+POST_SEARCH_HALF_LIFE_DAYS = float(os.getenv('POST_SEARCH_HALF_LIFE_DAYS', '7'))
+
+# Trending hashtag windows: name -> decay half-life in seconds
+TRENDING_WINDOWS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+# Stories expire after this many hours (purge_expired_stories deletes them)
+STORY_TTL_HOURS = 24
+# Story views are buffered in-process and flushed at either threshold
+STORY_VIEW_BUFFER_SIZE = 200
+STORY_VIEW_FLUSH_SECONDS = 5
+
+# Chat message pages
+CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', '50'))
+CHAT_MAX_PAGE_SIZE = int(os.getenv('CHAT_MAX_PAGE_SIZE', '200'))
+
+# Request instrumentation (main.instrumentation): JSON line per request at INFO
+# on the main.instrumentation logger (off by default; set
+# REQUEST_METRICS_LOG_LEVEL=INFO to enable); Server-Timing exposes
+# SQL/serializer timings
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', str(DEBUG)).lower() in ('true', '1', 'yes', 'on')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'main.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Comment pages (top-level and replies) and the per-post preview in feeds
+COMMENT_PAGE_SIZE = int(os.getenv('COMMENT_PAGE_SIZE', '20'))
+COMMENT_MAX_PAGE_SIZE = int(os.getenv('COMMENT_MAX_PAGE_SIZE', '100'))
+COMMENT_PREVIEW_SIZE = int(os.getenv('COMMENT_PREVIEW_SIZE', '2'))
+
+# Concurrent storage uploads per multi-image post
+POST_IMAGE_UPLOAD_WORKERS = int(os.getenv('POST_IMAGE_UPLOAD_WORKERS', '4'))
+
+# Background task queue (main.tasks) and image renditions (main.renditions)
+TASK_WORKERS = int(os.getenv('TASK_WORKERS', '2'))
+TASKS_ALWAYS_EAGER = os.getenv('TASKS_ALWAYS_EAGER', 'False').lower() in ('true', '1', 'yes', 'on')
+IMAGE_RENDITION_SIZES = {'thumb': 160, 'feed': 720, 'full': 1600}
+IMAGE_RENDITION_QUALITY = 80
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
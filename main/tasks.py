@@ -0,0 +1,49 @@
+"""
+Minimal in-process background task queue.
+
+Tasks are submitted to a bounded thread pool once the surrounding
+transaction commits, so request handlers return without waiting for them.
+Set ``TASKS_ALWAYS_EAGER = True`` (tests, management commands) to run
+tasks inline instead.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TASK_WORKERS', 2),
+                thread_name_prefix='tasks',
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+    finally:
+        connection.close()
+
+
+def enqueue(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the background after commit."""
+    if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
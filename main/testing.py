@@ -0,0 +1,72 @@
+"""
+Test helpers for per-endpoint query budgets and query plans.
+
+Responses that pass through ``RequestMetricsMiddleware`` carry their
+``request_metrics``; ``assertQueryBudget`` checks them, so a test states the
+budget of an endpoint and fails on N+1 regressions::
+
+    class FeedTests(QueryBudgetMixin, TestCase):
+        def test_feed(self):
+            response = self.client.get('/api/posts/')
+            self.assertQueryBudget(response, max_queries=6)
+
+``QueryPlanMixin.assertIndexScan`` EXPLAINs a queryset and checks that it
+is answered by a range of the named index with no separate sort step, on
+SQLite and PostgreSQL.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, response, max_queries):
+        """Fail if the request behind ``response`` ran more than ``max_queries`` SQL statements."""
+        metrics = getattr(response, 'request_metrics', None)
+        self.assertIsNotNone(metrics, 'Response has no request_metrics; is RequestMetricsMiddleware installed?')
+        self.assertLessEqual(
+            metrics.sql_count, max_queries,
+            f'{response.request["REQUEST_METHOD"]} {response.request["PATH_INFO"]} ran '
+            f'{metrics.sql_count} queries, budget is {max_queries}',
+        )
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, using=connection):
+        """Like ``assertNumQueries`` but an upper bound, for code outside a request."""
+        with CaptureQueriesContext(using) as captured:
+            yield captured
+        self.assertLessEqual(
+            len(captured), max_queries,
+            f'{len(captured)} queries executed, budget is {max_queries}:\n'
+            + '\n'.join(q['sql'] for q in captured.captured_queries),
+        )
+
+
+class QueryPlanMixin:
+    # Plan fragments that mean the rows were sorted after being fetched
+    SORT_STEPS = {'sqlite': ('TEMP B-TREE',), 'postgresql': ('Sort',)}
+
+    def query_plan(self, queryset):
+        vendor = connection.vendor
+        if vendor not in self.SORT_STEPS:
+            self.skipTest(f'No query plan checks for {vendor}')
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # Test tables are tiny; make the planner show the index it would use at scale
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertIndexScan(self, queryset, index_name):
+        """Fail unless ``queryset`` is served by ``index_name`` without sorting."""
+        plan = self.query_plan(queryset)
+        uses_index = (
+            f'INDEX {index_name}' in plan  # SQLite: USING [COVERING] INDEX
+            or f'using {index_name}' in plan  # PostgreSQL: Index [Only] Scan [Backward] using
+        )
+        self.assertTrue(uses_index, f'{index_name} not used:\n{plan}')
+        for step in self.SORT_STEPS[connection.vendor]:
+            self.assertNotIn(step, plan, f'Plan sorts rows instead of reading them in index order:\n{plan}')
+        return plan
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import Notification, NotificationCounter
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'verb', 'actor', 'actors_count', 'is_read', 'updated_at')
+    list_filter = ('verb', 'is_read')
+    raw_id_fields = ('recipient', 'actor', 'post')
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_count')
+    raw_id_fields = ('user',)
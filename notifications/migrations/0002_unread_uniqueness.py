@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def mark_duplicates_read(apps, schema_editor):
+    """Before the constraints: keep the newest unread notification of each
+    group, mark older duplicates read and recount the affected users."""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+    groups = [
+        (Notification.objects.filter(is_read=False, verb__in=['like', 'comment', 'share']), ('recipient', 'verb', 'post')),
+        (Notification.objects.filter(is_read=False, verb='follow'), ('recipient', 'actor')),
+    ]
+    recipients = set()
+    for unread, fields in groups:
+        for group in unread.values(*fields).annotate(n=Count('id'), newest=Max('id')).filter(n__gt=1):
+            newest = group.pop('newest')
+            group.pop('n')
+            unread.filter(**group).exclude(id=newest).update(is_read=True)
+            recipients.add(group['recipient'])
+    for recipient_id in recipients:
+        NotificationCounter.objects.filter(user_id=recipient_id).update(
+            unread_count=Notification.objects.filter(recipient_id=recipient_id, is_read=False).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('posts', '0012_trending_removals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_duplicates_read, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('verb__in', ['like', 'comment', 'share'])), fields=('recipient', 'verb', 'post'), name='notification_unread_post_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('verb', 'follow')), fields=('recipient', 'actor'), name='notification_unread_follow_uniq'),
+        ),
+    ]
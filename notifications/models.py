@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import models
+
+
+class Notification(models.Model):
+    """One entry in a user's activity list.
+
+    Repeated events of the same kind on the same post are folded into one
+    unread notification: ``actor`` is the latest actor and ``actors_count``
+    the number of distinct actors ("X and 12 others liked your post").
+    A follow is not repeated while the actor's previous one is unread.
+    """
+    class Verb(models.TextChoices):
+        LIKE = 'like', 'Like'
+        COMMENT = 'comment', 'Comment'
+        SHARE = 'share', 'Share'
+        FOLLOW = 'follow', 'Follow'
+        CONNECTION_REQUEST = 'connection_request', 'Connection request'
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    verb = models.CharField(max_length=32, choices=Verb.choices)
+    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    actors_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at', '-id'], name='notification_recent_idx'),
+            models.Index(fields=['recipient', 'verb', 'post', 'is_read'], name='notification_group_idx'),
+        ]
+        constraints = [
+            # At most one unread notification to fold into, even when
+            # deliveries race (services.deliver retries on the conflict)
+            models.UniqueConstraint(
+                fields=['recipient', 'verb', 'post'],
+                condition=models.Q(is_read=False, verb__in=['like', 'comment', 'share']),
+                name='notification_unread_post_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['recipient', 'actor'],
+                condition=models.Q(is_read=False, verb='follow'),
+                name='notification_unread_follow_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notification({self.verb} -> {self.recipient_id})"
+
+
+class NotificationActor(models.Model):
+    """Distinct actors folded into an aggregated notification."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = ('notification', 'actor')
+
+
+class NotificationCounter(models.Model):
+    """Denormalized unread count, read with a single primary-key lookup."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"NotificationCounter({self.user_id}: {self.unread_count})"
@@ -0,0 +1,129 @@
+"""
+Writing notifications off the request path.
+
+Views call ``notify(...)``, which queues ``deliver`` on the background task
+queue (main.tasks) after the triggering transaction commits. ``deliver``
+folds the event into an existing unread notification for the same
+(recipient, verb, post) when there is one, otherwise creates a new one and
+bumps the recipient's unread counter. A follow by an actor whose previous
+follow is still unread adds nothing.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from main.counters import bump_counter
+from main.pagination import keyset_filter
+from main.tasks import enqueue
+from .models import Notification, NotificationActor, NotificationCounter
+
+# Verbs folded into one notification per post; others are one row per event
+AGGREGATED_VERBS = {Notification.Verb.LIKE, Notification.Verb.COMMENT, Notification.Verb.SHARE}
+
+# List ordering: folding activity into a notification moves it to the top
+NOTIFICATION_ORDERING = ('-updated_at', '-id')
+
+
+def notify(recipient_id, actor_id, verb, post_id=None):
+    """Queue a notification for ``recipient_id``; self-actions are ignored."""
+    if recipient_id == actor_id:
+        return
+    enqueue(deliver, recipient_id, actor_id, verb, post_id)
+
+
+def _unread_group(recipient_id, actor_id, verb, post_id):
+    """The unread notification an event folds into, locked, or None."""
+    qs = Notification.objects.select_for_update().filter(recipient_id=recipient_id, verb=verb, is_read=False)
+    if verb in AGGREGATED_VERBS:
+        qs = qs.filter(post_id=post_id)
+    elif verb == Notification.Verb.FOLLOW:
+        qs = qs.filter(actor_id=actor_id)
+    else:
+        return None
+    return qs.order_by('-id').first()
+
+
+def _deliver(recipient_id, actor_id, verb, post_id):
+    existing = _unread_group(recipient_id, actor_id, verb, post_id)
+    if existing is not None:
+        if verb == Notification.Verb.FOLLOW:
+            # Unfollow and follow again while the first one is unread
+            return existing
+        _, added = NotificationActor.objects.get_or_create(notification=existing, actor_id=actor_id)
+        updates = {'actor_id': actor_id, 'updated_at': timezone.now()}
+        if added:
+            updates['actors_count'] = F('actors_count') + 1
+        Notification.objects.filter(pk=existing.pk).update(**updates)
+        return existing
+    notification = Notification.objects.create(
+        recipient_id=recipient_id, actor_id=actor_id, verb=verb, post_id=post_id,
+    )
+    if verb in AGGREGATED_VERBS:
+        NotificationActor.objects.create(notification=notification, actor_id=actor_id)
+    bump_counter(NotificationCounter, recipient_id, 1)
+    return notification
+
+
+def deliver(recipient_id, actor_id, verb, post_id=None):
+    try:
+        with transaction.atomic():
+            return _deliver(recipient_id, actor_id, verb, post_id)
+    except IntegrityError:
+        # A concurrent delivery created the unread notification first (the
+        # partial unique constraints); fold into that one instead
+        with transaction.atomic():
+            return _deliver(recipient_id, actor_id, verb, post_id)
+
+
+def unread_count(user_id):
+    return (
+        NotificationCounter.objects.filter(user_id=user_id)
+        .values_list('unread_count', flat=True).first()
+    ) or 0
+
+
+def mark_read(user_id, up_to=None):
+    """Mark notifications read and fix the counter.
+
+    ``up_to`` is the ``(updated_at, id)`` of the newest notification the
+    user has seen: it and every row below it in the list ordering are
+    marked, while activity folded in since (which moves a row back to the
+    top) stays unread. Without it everything is marked.
+    """
+    with transaction.atomic():
+        qs = Notification.objects.filter(recipient_id=user_id, is_read=False)
+        if up_to is not None:
+            updated_at, pk = up_to
+            qs = qs.filter(keyset_filter(NOTIFICATION_ORDERING, [updated_at, pk]) | Q(updated_at=updated_at, id=pk))
+        marked = qs.update(is_read=True)
+        if marked:
+            if up_to is None:
+                NotificationCounter.objects.filter(user_id=user_id).update(unread_count=0)
+            else:
+                bump_counter(NotificationCounter, user_id, -marked)
+    return marked
+
+
+def forget_unread(notifications):
+    """Take the unread rows of ``notifications`` off their recipients' counters
+    (before the rows are deleted outside ``mark_read``)."""
+    counts = (
+        notifications.filter(is_read=False).order_by()
+        .values('recipient_id').annotate(n=Count('*')).values_list('recipient_id', 'n')
+    )
+    for recipient_id, n in counts:
+        bump_counter(NotificationCounter, recipient_id, -n)
+
+
+def recount_unread(user_ids=None):
+    """Rebuild unread counters from the Notification rows; returns rows updated."""
+    unread = (
+        Notification.objects.filter(recipient=OuterRef('user'), is_read=False)
+        .order_by().values('recipient').annotate(c=Count('*')).values('c')
+    )
+    qs = NotificationCounter.objects.all()
+    if user_ids:
+        qs = qs.filter(user_id__in=user_ids)
+    return qs.update(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
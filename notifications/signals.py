@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Notification
+from .services import forget_unread
+
+
+# A deleted post or actor cascades its notifications away; take the unread
+# ones off the recipients' counters first
+
+@receiver(pre_delete, sender='posts.Post')
+def forget_post_notifications(sender, instance, **kwargs):
+    forget_unread(Notification.objects.filter(post=instance))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def forget_actor_notifications(sender, instance, **kwargs):
+    # The actor's own notifications and counter go with them
+    forget_unread(Notification.objects.filter(actor=instance).exclude(recipient=instance))
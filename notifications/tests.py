@@ -0,0 +1,127 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from posts.models import Post
+from . import services
+from .models import Notification, NotificationCounter
+from .services import deliver, mark_read, unread_count
+
+LIKE, FOLLOW = Notification.Verb.LIKE, Notification.Verb.FOLLOW
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.author, self.fan1, self.fan2 = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            for name in ('author', 'fan1', 'fan2')
+        ]
+        self.post = Post.objects.create(author=self.author, content='hello')
+
+    def test_likes_fold_into_one_unread_notification(self):
+        deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        deliver(self.author.pk, self.fan2.pk, LIKE, self.post.pk)
+        deliver(self.author.pk, self.fan2.pk, LIKE, self.post.pk)  # unlike and like again
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual((notification.actor_id, notification.actors_count), (self.fan2.pk, 2))
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+        # Once read, the next like starts a new notification
+        mark_read(self.author.pk)
+        deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 2)
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_refollow_does_not_repeat_notification(self):
+        self.client.force_login(self.fan1)
+        for _ in range(3):  # follow, unfollow, follow
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/api/auth/follow/{self.author.pk}/')
+        self.assertEqual(Notification.objects.filter(recipient=self.author, verb=FOLLOW).count(), 1)
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    def _position(self, notification):
+        notification.refresh_from_db()
+        return notification.updated_at, notification.pk
+
+    def test_mark_read_up_to_position(self):
+        first = deliver(self.author.pk, self.fan1.pk, FOLLOW)
+        second = deliver(self.author.pk, self.fan2.pk, FOLLOW)
+        self.assertEqual(unread_count(self.author.pk), 2)
+        self.assertEqual(mark_read(self.author.pk, up_to=self._position(first)), 1)
+        self.assertEqual(unread_count(self.author.pk), 1)
+        self.assertEqual(mark_read(self.author.pk, up_to=self._position(first)), 0)
+        self.assertEqual(mark_read(self.author.pk), 1)
+        self.assertEqual(unread_count(self.author.pk), 0)
+        self.assertTrue(Notification.objects.get(pk=second.pk).is_read)
+
+    def test_mark_read_follows_list_order_not_ids(self):
+        liked = deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        followed = deliver(self.author.pk, self.fan2.pk, FOLLOW)
+        self.client.force_login(self.author)
+        top = self.client.get('/api/notifications/').json()['results'][0]
+        self.assertEqual(top['id'], followed.pk)
+
+        # A new like folds into the older, lower-id notification after the
+        # list was read: it moves to the top and is not marked
+        deliver(self.author.pk, self.fan2.pk, LIKE, self.post.pk)
+        response = self.client.post('/api/notifications/read/', {'up_to': top['id'], 'updated_at': top['updated_at']})
+        self.assertEqual(response.json(), {'marked': 1, 'unread_count': 1})
+        self.assertFalse(Notification.objects.get(pk=liked.pk).is_read)
+
+        # Seeing the folded row on top marks it even though its id is lower
+        top = self.client.get('/api/notifications/').json()['results'][0]
+        self.assertEqual(top['id'], liked.pk)
+        response = self.client.post('/api/notifications/read/', {'up_to': top['id'], 'updated_at': top['updated_at']})
+        self.assertEqual(response.json(), {'marked': 1, 'unread_count': 0})
+
+    def test_mark_read_needs_listed_updated_at(self):
+        deliver(self.author.pk, self.fan1.pk, FOLLOW)
+        self.client.force_login(self.author)
+        response = self.client.post('/api/notifications/read/', {'up_to': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    def test_second_unread_group_row_is_rejected(self):
+        deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(recipient=self.author, actor=self.fan2, verb=LIKE, post=self.post)
+
+    def test_racing_delivery_folds_into_winner(self):
+        winner = deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        # The second delivery's lookup ran before the winner committed
+        with mock.patch.object(services, '_unread_group', side_effect=[None, winner]):
+            deliver(self.author.pk, self.fan2.pk, LIKE, self.post.pk)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actors_count, 2)
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_deleting_post_takes_its_notifications_off_the_badge(self):
+        self.client.force_login(self.fan1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/posts/{self.post.pk}/like/')
+        deliver(self.author.pk, self.fan2.pk, FOLLOW)
+        self.assertEqual(unread_count(self.author.pk), 2)
+
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.delete(f'/api/posts/{self.post.pk}/').status_code, 204)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread_count': 1})
+
+    def test_deleting_actor_takes_their_notifications_off_the_badge(self):
+        deliver(self.author.pk, self.fan1.pk, LIKE, self.post.pk)
+        deliver(self.author.pk, self.fan1.pk, FOLLOW)
+        deliver(self.fan1.pk, self.author.pk, FOLLOW)
+        self.fan1.delete()
+        self.assertEqual(unread_count(self.author.pk), 0)
+
+    def test_recount_repairs_drifted_counter(self):
+        deliver(self.author.pk, self.fan1.pk, FOLLOW)
+        NotificationCounter.objects.filter(user=self.author).update(unread_count=5)
+        call_command('recount_unread_counters', stdout=io.StringIO())
+        self.assertEqual(unread_count(self.author.pk), 1)
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.list_notifications, name='notification-list'),
+    path('unread-count/', views.get_unread_count, name='notification-unread-count'),
+    path('read/', views.mark_notifications_read, name='notification-mark-read'),
+]
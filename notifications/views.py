@@ -0,0 +1,101 @@
+from datetime import timezone as dt_timezone
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from main.instrumentation import timed
+from main.pagination import paginate_keyset, get_page_size, InvalidCursor
+from posts.serializers import AuthorSerializer
+from .models import Notification
+from .services import NOTIFICATION_ORDERING, unread_count, mark_read
+
+MESSAGES = {
+    Notification.Verb.LIKE: 'liked your post',
+    Notification.Verb.COMMENT: 'commented on your post',
+    Notification.Verb.SHARE: 'shared your post',
+    Notification.Verb.FOLLOW: 'started following you',
+    Notification.Verb.CONNECTION_REQUEST: 'sent you a connection request',
+}
+
+
+@timed('serializer')
+def serialize_notification(n, context):
+    actor = AuthorSerializer(n.actor, context=context).data
+    others = n.actors_count - 1
+    text = f"{actor['full_name']}"
+    if others > 0:
+        text += f" and {others} other{'s' if others > 1 else ''}"
+    return {
+        'id': n.id,
+        'verb': n.verb,
+        'actor': actor,
+        'actors_count': n.actors_count,
+        'post_id': n.post_id,
+        'message': f"{text} {MESSAGES.get(n.verb, n.verb)}",
+        'is_read': n.is_read,
+        'created_at': n.created_at,
+        'updated_at': n.updated_at,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_notifications(request):
+    """Current user's notifications, most recently updated first (cursor paginated)."""
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'FEED_PAGE_SIZE', 20),
+        getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+    )
+    qs = Notification.objects.filter(recipient=request.user).select_related('actor')
+    try:
+        page, next_cursor = paginate_keyset(qs, NOTIFICATION_ORDERING, request.query_params.get('cursor'), page_size)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    context = {'request': request}
+    return Response({
+        'results': [serialize_notification(n, context) for n in page],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unread_count(request):
+    """Unread notification badge: one primary-key read."""
+    return Response({'unread_count': unread_count(request.user.id)})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark all notifications read, or those the user has seen.
+
+    To mark only what was seen, send ``up_to`` and ``updated_at``: the ``id``
+    and ``updated_at`` of the top notification as it was listed. That row
+    and everything below it in the list are marked read. A row that has
+    since received new activity moved above it and stays unread.
+    """
+    up_to = request.data.get('up_to')
+    if up_to not in (None, ''):
+        try:
+            pk = int(up_to)
+            updated_at = parse_datetime(str(request.data.get('updated_at') or ''))
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return Response(
+                {'error': 'up_to must be an integer sent with the updated_at it was listed with'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(updated_at):
+            updated_at = timezone.make_aware(updated_at, dt_timezone.utc)
+        up_to = (updated_at, pk)
+    else:
+        up_to = None
+    marked = mark_read(request.user.id, up_to)
+    return Response({'marked': marked, 'unread_count': unread_count(request.user.id)})
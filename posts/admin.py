@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, PostImage, Like, Comment, Share, Story
+from .models import Post, PostImage, Like, Comment, Share, Story, TimelineEntry, Hashtag
 
 
 class PostImageInline(admin.TabularInline):
@@ -48,3 +48,16 @@ class StoryAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "media_type", "created_at")
     list_filter = ("media_type", "created_at")
     search_fields = ("user__email", "user__username", "content")
+
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "post", "created_at")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user", "post")
+
+
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "created_at")
+    search_fields = ("name",)
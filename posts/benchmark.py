@@ -0,0 +1,144 @@
+"""
+Endpoint benchmarks over the synthetic dataset (posts.synthetic).
+
+Each endpoint is requested through the Django test client as a
+representative user: one warm-up request, then ``iterations`` measured
+ones. Per endpoint we report p50/p95 latency, the query count (from
+``RequestMetricsMiddleware``) and the peak Python memory allocated while
+handling one more, traced request (tracemalloc).
+
+Results can be saved as a JSON baseline and later runs compared against
+it: more queries than the baseline, or p95 latency / peak memory above
+``tolerance`` times the baseline, is a regression.
+"""
+
+import gc
+import json
+import logging
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.test import Client
+
+from chat.models import ConversationParticipant
+from .models import Story
+
+# Latency below this many milliseconds over the baseline is treated as noise
+LATENCY_NOISE_MS = 10.0
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def benchmark_user():
+    """A well-connected user: follows the most accounts, so feeds are full."""
+    User = get_user_model()
+    return User.objects.annotate(n=Count('following')).order_by('-n', 'id').first()
+
+
+def endpoints(user):
+    """Endpoint name -> path, for the main read paths as seen by ``user``."""
+    partner = (
+        ConversationParticipant.objects.filter(conversation__participants__user=user)
+        .exclude(user=user).values_list('user_id', flat=True).first()
+    )
+    story = Story.objects.filter(user=user).order_by('-created_at').values_list('pk', flat=True).first()
+    paths = {
+        'feed': '/api/posts/',
+        'home_feed': '/api/posts/home/',
+        'ranked_feed': '/api/posts/ranked/',
+        'post_search': '/api/posts/search/?q=coffee',
+        'tag_feed': '/api/posts/tags/travel/',
+        'trending_tags': '/api/posts/tags/trending/',
+        'stories': '/api/posts/stories/',
+        'user_search': '/api/auth/search/?q=khan',
+        'followers': '/api/auth/followers/',
+        'following': '/api/auth/following/',
+        'suggestions': '/api/auth/suggestions/',
+        'chat_threads': '/api/chat/recent/',
+        'unread_counts': '/api/chat/unread/',
+        'notifications': '/api/notifications/',
+    }
+    if partner:
+        paths['chat_messages'] = f'/api/chat/{partner}/'
+    if story:
+        paths['story_viewers'] = f'/api/posts/stories/{story}/viewers/'
+    return paths
+
+
+def run(user, paths, iterations=20):
+    """Measure ``paths`` as ``user``; returns ``{name: stats}``."""
+    client = Client()
+    client.force_login(user)
+    metrics_logger = logging.getLogger('main.instrumentation')
+    previous_level = metrics_logger.level
+    metrics_logger.setLevel(logging.WARNING)
+    results = {}
+    try:
+        for name, path in paths.items():
+            client.get(path)  # warm caches and connections
+            latencies, queries = [], 0
+            # Like timeit: keep collector pauses out of the timings
+            gc.collect()
+            gc.disable()
+            try:
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    response = client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    queries = max(queries, response.request_metrics.sql_count)
+            finally:
+                gc.enable()
+            # Memory is traced in a separate request: tracing skews latency
+            tracemalloc.start()
+            try:
+                client.get(path)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            results[name] = {
+                'path': path,
+                'status': response.status_code,
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'queries': queries,
+                'peak_kb': round(peak / 1024, 1),
+            }
+    finally:
+        metrics_logger.setLevel(previous_level)
+    return results
+
+
+def compare(results, baseline, tolerance=1.5):
+    """List human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current['status'] != base['status']:
+            regressions.append(f"{name}: status {current['status']} (baseline {base['status']})")
+        if current['queries'] > base['queries']:
+            regressions.append(f"{name}: {current['queries']} queries (baseline {base['queries']})")
+        limit = max(base['p95_ms'] * tolerance, base['p95_ms'] + LATENCY_NOISE_MS)
+        if current['p95_ms'] > limit:
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms (baseline {base['p95_ms']}ms)")
+        if current['peak_kb'] > base['peak_kb'] * tolerance:
+            regressions.append(f"{name}: peak {current['peak_kb']}KB (baseline {base['peak_kb']}KB)")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)['results']
+
+
+def save_baseline(path, results, meta):
+    with open(path, 'w') as fh:
+        json.dump({'meta': meta, 'results': results}, fh, indent=2, sort_keys=True)
@@ -0,0 +1,106 @@
+"""
+Cache for the viewer-independent part of serialized posts and author cards.
+
+Entries are keyed by object id and ``updated_at`` so any save that bumps
+``updated_at`` (edit, image replacement, profile update) makes the old entry
+unreachable. Keys also carry how many of the object's images have
+renditions, so the background rendition task (main.renditions) retires an
+entry without touching ``updated_at``, which clients see as "edited".
+Counters, ``liked_by_me`` and the comment preview are never cached; they
+are merged on top from the live instance and serializer context at
+response time.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from main.instrumentation import timed
+
+from .serializers import AuthorSerializer, PostSerializer
+
+# Fields read from the live row / viewer context instead of the cache
+LIVE_FIELDS = ('user', 'likes_count', 'comments_count', 'shares_count', 'liked_by_me', 'comments_preview')
+
+
+class PostBodySerializer(PostSerializer):
+    class Meta(PostSerializer.Meta):
+        fields = [f for f in PostSerializer.Meta.fields if f not in LIVE_FIELDS]
+
+
+def _timeout():
+    return getattr(settings, 'SERIALIZER_CACHE_TIMEOUT', 3600)
+
+
+def _version():
+    return getattr(settings, 'SERIALIZER_CACHE_VERSION', 1)
+
+
+def _base(context):
+    # Local media URLs are made absolute with the request host, so the host
+    # is part of the key
+    request = context.get('request')
+    if not request:
+        return '-'
+    return hashlib.md5(request.build_absolute_uri('/').encode()).hexdigest()[:12]
+
+
+def post_cache_key(post, base):
+    # images are prefetched by every feed query
+    rendered = sum(1 for image in post.images.all() if image.renditions)
+    return f"post:{post.pk}:{post.updated_at.timestamp()}:{rendered}:{base}"
+
+
+def author_cache_key(user, base):
+    rendered = int(bool(getattr(user, 'profile_picture_renditions', None)))
+    return f"author:{user.pk}:{user.updated_at.timestamp()}:{rendered}:{base}"
+
+
+@timed('serializer')
+def serialize_posts(posts, context):
+    """Serialize ``posts`` like ``PostSerializer(many=True)`` using the cache.
+
+    Costs one ``get_many`` and at most one ``set_many`` round trip per page.
+    Posts must have ``author`` and ``images`` loaded (``select_related('author')``,
+    ``prefetch_related('images')``).
+    """
+    base = _base(context)
+    post_keys = {p.pk: post_cache_key(p, base) for p in posts}
+    author_keys = {p.author_id: author_cache_key(p.author, base) for p in posts}
+    cached = cache.get_many(list(post_keys.values()) + list(author_keys.values()), version=_version())
+
+    missing = {}
+    for p in posts:
+        key = post_keys[p.pk]
+        if key not in cached and key not in missing:
+            missing[key] = dict(PostBodySerializer(p, context=context).data)
+        key = author_keys[p.author_id]
+        if key not in cached and key not in missing:
+            missing[key] = dict(AuthorSerializer(p.author, context=context).data)
+    if missing:
+        cache.set_many(missing, timeout=_timeout(), version=_version())
+        cached.update(missing)
+
+    viewer_fields = PostSerializer(context=context)
+    results = []
+    for p in posts:
+        body = cached[post_keys[p.pk]]
+        live = {
+            'user': cached[author_keys[p.author_id]],
+            'likes_count': p.likes_count,
+            'comments_count': p.comments_count,
+            'shares_count': p.shares_count,
+            'liked_by_me': viewer_fields.get_liked_by_me(p),
+            'comments_preview': viewer_fields.get_comments_preview(p),
+        }
+        results.append({f: live[f] if f in live else body[f] for f in PostSerializer.Meta.fields})
+    return results
+
+
+def invalidate_post(post, context):
+    cache.delete(post_cache_key(post, _base(context)), version=_version())
+
+
+def invalidate_author(user, context):
+    cache.delete(author_cache_key(user, _base(context)), version=_version())
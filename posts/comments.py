@@ -0,0 +1,60 @@
+"""
+Threaded comments: one level of replies under top-level comments.
+
+Top-level comments and replies are both paged oldest first on
+``(created_at, id)``, backed by ``comment_post_created_idx`` and
+``comment_parent_created_idx``. Feed pages embed a short preview of each
+post's top comments, fetched for the whole page with one windowed query.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post, Comment
+
+COMMENT_ORDERING = ('created_at', 'id')
+# "Top" comments in a preview: most replied first, then newest
+PREVIEW_ORDERING = ('-replies_count', '-created_at', '-id')
+
+
+def preview_size():
+    return getattr(settings, 'COMMENT_PREVIEW_SIZE', 2)
+
+
+def create_comment(post, user, text, parent=None):
+    """Create a comment or reply and bump the denormalized counters.
+
+    A reply to a reply is attached to its top-level comment so threads stay
+    one level deep.
+    """
+    if parent is not None and parent.parent_id is not None:
+        parent = parent.parent
+    with transaction.atomic():
+        comment = Comment.objects.create(post=post, user=user, text=text, parent=parent)
+        Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+        if parent is not None:
+            Comment.objects.filter(pk=parent.pk).update(replies_count=F('replies_count') + 1)
+    return comment
+
+
+def comment_previews(post_ids, limit=None):
+    """Map post id -> its top ``limit`` top-level comments, in one query."""
+    limit = preview_size() if limit is None else limit
+    previews = {pk: [] for pk in post_ids}
+    if not post_ids or limit <= 0:
+        return previews
+    rows = (
+        Comment.objects
+        .filter(post_id__in=post_ids, parent__isnull=True)
+        .select_related('user')
+        .annotate(rank=Window(RowNumber(), partition_by=[F('post_id')], order_by=[
+            F(name.lstrip('-')).desc() if name.startswith('-') else F(name).asc() for name in PREVIEW_ORDERING
+        ]))
+        .filter(rank__lte=limit)
+        .order_by('post_id', 'rank')
+    )
+    for c in rows:
+        previews[c.post_id].append(c)
+    return previews
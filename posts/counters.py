@@ -0,0 +1,33 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model):
+    counts = (
+        model.objects
+        .filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(c=Count('*'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def recount_post_counters(post_model, like_model, comment_model, share_model, queryset=None, batch_size=1000):
+    """Recompute denormalized engagement counters with one UPDATE per id batch.
+
+    Models are passed in so the same code can run from a data migration
+    with historical models. Returns the number of posts updated.
+    """
+    qs = queryset if queryset is not None else post_model.objects.all()
+    ids = list(qs.order_by('pk').values_list('pk', flat=True))
+    updated = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        updated += post_model.objects.filter(pk__in=batch).update(
+            likes_count=_count_subquery(like_model),
+            comments_count=_count_subquery(comment_model),
+            shares_count=_count_subquery(share_model),
+        )
+    return updated
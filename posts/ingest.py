@@ -0,0 +1,76 @@
+"""
+Batched image ingestion for posts.
+
+Uploads go to storage (Cloudinary in production) concurrently through a
+bounded thread pool before any row is written; the rows are then inserted
+with a single ``bulk_create`` in the caller's transaction. If an upload or
+the transaction fails, files already sent to storage are deleted again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from main.renditions import schedule_renditions
+from .models import PostImage
+
+
+def _upload_workers():
+    return getattr(settings, 'POST_IMAGE_UPLOAD_WORKERS', 4)
+
+
+def upload_images(files):
+    """Upload ``files`` concurrently and return their stored names in order."""
+    field = PostImage._meta.get_field('image')
+    storage = field.storage
+    if not files:
+        return []
+
+    def upload(f):
+        name = field.generate_filename(None, f.name)
+        return storage.save(name, f, max_length=field.max_length)
+
+    workers = max(1, min(len(files), _upload_workers()))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(upload, f) for f in files]
+    names, errors = [], []
+    for future in futures:
+        try:
+            names.append(future.result())
+        except Exception as e:
+            errors.append(e)
+    if errors:
+        delete_uploads(names)
+        raise errors[0]
+    return names
+
+
+def delete_uploads(names):
+    storage = PostImage._meta.get_field('image').storage
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            pass
+
+
+def save_post_with_images(post, files, update_fields=None, replace=False):
+    """Save ``post`` and attach ``files`` as its images in one transaction.
+
+    ``update_fields`` is passed to ``post.save`` for existing posts. With
+    ``replace=True`` the post's current image rows are removed first.
+    """
+    names = upload_images(files)
+    try:
+        with transaction.atomic():
+            post.save(update_fields=update_fields)
+            if replace and names:
+                post.images.all().delete()
+            images = PostImage.objects.bulk_create([PostImage(post=post, image=name) for name in names])
+            for image in images:
+                schedule_renditions(image, 'image', 'renditions')
+    except Exception:
+        delete_uploads(names)
+        raise
+    return post
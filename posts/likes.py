@@ -0,0 +1,50 @@
+"""
+Idempotent like / unlike.
+
+Each write is a single conditional statement on the like table followed by
+an adjustment of ``Post.likes_count`` in the same transaction, and only when
+the first statement actually changed a row. Repeating a like or an unlike
+(double clicks, retries, concurrent workers) is a no-op instead of an
+IntegrityError or a drifting counter. The count returned is the
+denormalized value, never a COUNT(*).
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Post, Like
+
+
+def _adjust_likes_count(cursor, post_id, delta):
+    cursor.execute(
+        f"UPDATE {Post._meta.db_table} SET likes_count = likes_count + %s "
+        f"WHERE id = %s RETURNING likes_count",
+        [delta, post_id],
+    )
+    return cursor.fetchone()[0]
+
+
+def _current_likes_count(post_id):
+    return Post.objects.filter(pk=post_id).values_list('likes_count', flat=True).first() or 0
+
+
+def like_post(post_id, user_id):
+    """Like ``post_id`` as ``user_id``. Returns ``(created, likes_count)``."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Like._meta.db_table} (post_id, user_id, created_at) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (post_id, user_id) DO NOTHING RETURNING id",
+            [post_id, user_id, timezone.now()],
+        )
+        if cursor.fetchone() is None:
+            return False, _current_likes_count(post_id)
+        return True, _adjust_likes_count(cursor, post_id, 1)
+
+
+def unlike_post(post_id, user_id):
+    """Remove ``user_id``'s like on ``post_id``. Returns ``(deleted, likes_count)``."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        deleted, _ = Like.objects.filter(post_id=post_id, user_id=user_id).delete()
+        if not deleted:
+            return False, _current_likes_count(post_id)
+        return True, _adjust_likes_count(cursor, post_id, -1)
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Post
+from posts.timeline import fanout_post, timeline_audience
+
+
+class Command(BaseCommand):
+    help = "Backfill materialized home timelines from existing posts and the follow/connection graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Only fan out posts newer than this many days (0 = all)')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('id', 'author_id', 'created_at').order_by('created_at')
+        if options['days']:
+            posts = posts.filter(created_at__gte=timezone.now() - timedelta(days=options['days']))
+        audiences = {}
+        total = 0
+        for post in posts.iterator(chunk_size=2000):
+            if post.author_id not in audiences:
+                audiences[post.author_id] = timeline_audience(post.author_id)
+            fanout_post(post, audiences[post.author_id])
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"Fanned out {total} posts to {len(audiences)} author audiences"))
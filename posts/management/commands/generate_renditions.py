@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from chat.models import Message
+from main.renditions import process_renditions
+from posts.models import PostImage, Story
+
+
+class Command(BaseCommand):
+    help = "Generate missing image renditions for existing uploads"
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        targets = [
+            (PostImage.objects.all(), 'image', 'renditions'),
+            (Story.objects.filter(media_type=Story.MediaType.IMAGE), 'media', 'renditions'),
+            (Message.objects.filter(message_type=Message.MessageType.IMAGE), 'media', 'renditions'),
+            (User.objects.all(), 'profile_picture', 'profile_picture_renditions'),
+            (User.objects.all(), 'cover_photo', 'cover_photo_renditions'),
+        ]
+        total = 0
+        for qs, field_name, renditions_field in targets:
+            pending = (
+                qs.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+                .filter(**{renditions_field: {}})
+            )
+            for obj in pending.only('pk', field_name).iterator():
+                process_renditions(qs.model._meta.label, obj.pk, field_name, renditions_field)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} images"))
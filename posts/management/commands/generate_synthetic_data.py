@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = "Insert a seeded synthetic dataset (power-law follower graph, posts, engagement, stories, chats)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--days', type=int, default=14, help='Spread post timestamps over this many days')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        counts = generate(
+            users=options['users'],
+            posts_per_user=options['posts_per_user'],
+            days=options['days'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        summary = ', '.join(f"{n} {name}" for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}"))
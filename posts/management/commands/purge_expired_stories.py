@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.stories import purge_expired_stories
+
+
+class Command(BaseCommand):
+    help = "Delete stories older than STORY_TTL_HOURS and their media files (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows, files = purge_expired_stories(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {rows} expired stories and {files} media files"))
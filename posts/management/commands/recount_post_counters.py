@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_post_counters
+from posts.models import Post, Like, Comment, Share
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.likes_count/comments_count/shares_count from the related tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, nargs='*', dest='post_ids', help='Only repair these post ids')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        qs = Post.objects.all()
+        if options['post_ids']:
+            qs = qs.filter(pk__in=options['post_ids'])
+        updated = recount_post_counters(Post, Like, Comment, Share, queryset=qs, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recounted engagement counters for {updated} posts"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from chat.conversations import recount_unread as recount_messages
+from notifications.services import recount_unread as recount_notifications
+
+
+class Command(BaseCommand):
+    help = "Recompute the unread notification and chat message counters from the unread rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='*', dest='user_ids', help='Only repair these user ids')
+
+    def handle(self, *args, **options):
+        updated = recount_notifications(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Recounted unread notifications for {updated} users"))
+        updated = recount_messages(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Recounted unread messages for {updated} users"))
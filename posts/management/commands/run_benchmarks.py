@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmark
+from posts.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main endpoints on a seeded synthetic dataset and compare "
+        "p50/p95 latency, query counts and peak memory against a saved baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=300)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmark_baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='Allowed p95 latency / peak memory growth over the baseline (factor)')
+        parser.add_argument('--existing-data', action='store_true',
+                            help='Benchmark the current database instead of a throwaway one with generated data')
+
+    def handle(self, *args, **options):
+        old_name = None
+        if not options['existing_data']:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            if not options['existing_data']:
+                self.stdout.write(f"Generating {options['users']} users (seed {options['seed']})...")
+                generate(users=options['users'], posts_per_user=options['posts_per_user'], seed=options['seed'])
+            user = benchmark.benchmark_user()
+            if user is None:
+                raise CommandError("No users to benchmark with")
+            results = benchmark.run(user, benchmark.endpoints(user), iterations=options['iterations'])
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'endpoint':<16}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KB':>10}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<16}{r['status']:>7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['queries']:>9}{r['peak_kb']:>10.1f}"
+            )
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            meta = {k: options[k] for k in ('users', 'posts_per_user', 'seed', 'iterations')}
+            benchmark.save_baseline(baseline_path, results, meta)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {baseline_path}"))
+            return
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f"No baseline at {baseline_path}; run with --save-baseline to create one"))
+            return
+        regressions = benchmark.compare(results, benchmark.load_baseline(baseline_path), options['tolerance'])
+        if regressions:
+            raise CommandError("Benchmark regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
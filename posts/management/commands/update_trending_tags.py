@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.tags import update_trending
+
+
+class Command(BaseCommand):
+    help = "Fold new hashtag uses into the trending scores (run periodically, e.g. every minute from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        processed = update_trending(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} hashtag uses"))
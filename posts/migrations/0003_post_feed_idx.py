@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_is_pinned'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_feed_idx'),
+        ),
+    ]
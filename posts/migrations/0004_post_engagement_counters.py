@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:47
+
+from django.db import migrations, models
+
+from posts.counters import recount_post_counters
+
+
+def backfill_counters(apps, schema_editor):
+    recount_post_counters(
+        apps.get_model('posts', 'Post'),
+        apps.get_model('posts', 'Like'),
+        apps.get_model('posts', 'Comment'),
+        apps.get_model('posts', 'Share'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='shares_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
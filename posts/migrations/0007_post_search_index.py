@@ -0,0 +1,50 @@
+from django.db import migrations
+
+from posts.search import FTS_TABLE
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "doc_type UNINDEXED, ref_id UNINDEXED, post_id UNINDEXED, author_id UNINDEXED, "
+            "created_ts UNINDEXED, body, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, doc_type, ref_id, post_id, author_id, created_ts, body) "
+            "SELECT id * 2, 'post', id, id, author_id, CAST(strftime('%s', created_at) AS REAL), content FROM posts_post"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, doc_type, ref_id, post_id, author_id, created_ts, body) "
+            "SELECT id * 2 + 1, 'comment', id, post_id, user_id, CAST(strftime('%s', created_at) AS REAL), text FROM posts_comment"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS posts_post_content_search_idx ON posts_post "
+            "USING GIN (to_tsvector('simple', coalesce(content, '')))"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS posts_comment_text_search_idx ON posts_comment "
+            "USING GIN (to_tsvector('simple', coalesce(text, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS posts_post_content_search_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS posts_comment_text_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_postimage_renditions_story_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_hashtags_mentions_trending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['user', '-created_at'], name='story_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['created_at'], name='story_created_idx'),
+        ),
+    ]
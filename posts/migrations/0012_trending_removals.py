@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posthashtag',
+            name='added_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name='PostHashtagRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_hashtag_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.hashtag')),
+            ],
+        ),
+    ]
@@ -1,15 +1,26 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 
 
 class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField(blank=True)
     is_pinned = models.BooleanField(default=False, help_text="Pin this post to the top of the feed")
+    # Denormalized engagement counters, kept in sync with F() updates on write
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves the feed ordering and its keyset cursor
+            models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_feed_idx'),
+        ]
+
     def __str__(self):
         return f"Post {self.pk} by {self.author_id}"
 
@@ -17,6 +28,8 @@ class Post(models.Model):
 class PostImage(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='posts/')
+    # {size: storage name} written by main.renditions once processed
+    renditions = models.JSONField(default=dict, blank=True)
 
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
@@ -37,8 +50,17 @@ class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     text = models.TextField()
+    # One level of threading: replies always point at a top-level comment
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    replies_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            models.Index(fields=['parent', 'created_at', 'id'], name='comment_parent_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment({self.user_id} on {self.post_id})"
 
@@ -57,6 +79,107 @@ class Share(models.Model):
         return f"Share({self.user_id} -> {self.post_id})"
 
 
+class TimelineEntry(models.Model):
+    """Materialized home-timeline row: ``post`` appears in ``user``'s feed.
+
+    Written on post creation (fan-out-on-write). ``created_at`` copies the
+    post's timestamp so the timeline can be read from the index alone.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"TimelineEntry({self.user_id} <- {self.post_id})"
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_hashtags')
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='post_hashtags')
+    # Copy of the post's created_at so the tag feed is served by the index
+    created_at = models.DateTimeField()
+    # When the row was written (an edit tags an old post); the trending
+    # job's settle window is measured on this, not on created_at
+    added_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('post', 'hashtag')
+        indexes = [
+            models.Index(fields=['hashtag', '-created_at', '-post'], name='posthashtag_tag_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"PostHashtag({self.post_id}, {self.hashtag_id})"
+
+
+class Mention(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='mentions')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mentions')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'user')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='mention_user_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Mention({self.user_id} in {self.post_id})"
+
+
+class TrendingScore(models.Model):
+    """Forward-decayed usage score of a hashtag for one trending window.
+
+    ``log_score`` is log(sum(exp((t_use - epoch) / tau))) over the tag's
+    uses. Ordering by it equals ordering by the count decayed to any "now",
+    so the periodic job only has to fold in new uses.
+    """
+    window = models.CharField(max_length=16)
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='trending_scores')
+    log_score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('window', 'hashtag')
+        indexes = [
+            models.Index(fields=['window', '-log_score'], name='trending_window_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"TrendingScore({self.window}, {self.hashtag_id})"
+
+
+class PostHashtagRemoval(models.Model):
+    """A deleted PostHashtag (tag edited out or post deleted), queued for the
+    trending job to subtract if the use was already folded into a score."""
+    post_hashtag_id = models.BigIntegerField()
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"PostHashtagRemoval({self.post_hashtag_id}, {self.hashtag_id})"
+
+
+class TrendingCheckpoint(models.Model):
+    """Highest PostHashtag id already folded into TrendingScore (single row)."""
+    last_post_hashtag_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
 class Story(models.Model):
     class MediaType(models.TextChoices):
         TEXT = 'text', 'Text'
@@ -69,8 +192,34 @@ class Story(models.Model):
     media_type = models.CharField(max_length=10, choices=MediaType.choices, default=MediaType.TEXT)
     media = models.FileField(upload_to='stories/', blank=True, null=True,
                              validators=[FileExtensionValidator(allowed_extensions=['jpg','jpeg','png','gif','mp4','mov','webm'])])
+    renditions = models.JSONField(default=dict, blank=True)
+    # Aggregated from StoryView when the view buffer flushes
+    views_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Active stories of a set of authors, newest first
+            models.Index(fields=['user', '-created_at'], name='story_user_recent_idx'),
+            # Expiry purge
+            models.Index(fields=['created_at'], name='story_created_idx'),
+        ]
+
     def __str__(self):
         return f"Story({self.user_id}, {self.media_type})"
+
+
+class StoryView(models.Model):
+    story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='views')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='story_views')
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('story', 'user')
+        indexes = [
+            models.Index(fields=['story', '-viewed_at'], name='storyview_story_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"StoryView({self.user_id} -> {self.story_id})"
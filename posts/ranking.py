@@ -0,0 +1,165 @@
+"""
+Ranked feed: bounded candidate generation followed by pluggable scoring.
+
+Candidates are the most recent posts of the viewer's graph (self, followed
+and connected authors) plus the most recent posts overall, each source
+capped, and only light columns are loaded. Scorers work column-wise on the
+whole candidate set at once and return one score per candidate.
+
+The cursor pins the ``now`` the first page was scored at, so later pages
+rescore the same candidate window consistently.
+"""
+
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts import graph
+from main.pagination import encode_cursor, decode_raw_cursor, InvalidCursor
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Relationship strength by how the viewer relates to the author
+SELF, CONNECTED, FOLLOWING, OTHER = 'self', 'connected', 'following', 'other'
+DEFAULT_RELATIONSHIP_WEIGHTS = {SELF: 0.8, CONNECTED: 1.0, FOLLOWING: 0.6, OTHER: 0.2}
+
+
+class Candidates:
+    """Column-oriented candidate set: one list per feature, aligned by index."""
+
+    def __init__(self, rows, relationship_of, now):
+        self.ids = [r[0] for r in rows]
+        self.author_ids = [r[1] for r in rows]
+        self.age_hours = [max(0.0, (now - r[2]).total_seconds() / 3600) for r in rows]
+        self.likes = [r[3] for r in rows]
+        self.comments = [r[4] for r in rows]
+        self.shares = [r[5] for r in rows]
+        self.relationships = [relationship_of(a) for a in self.author_ids]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class Scorer:
+    """Base class: ``score`` maps a ``Candidates`` set to a list of floats."""
+    name = None
+
+    def score(self, candidates):
+        raise NotImplementedError
+
+
+class RecencyScorer(Scorer):
+    """Newest first (chronological feed)."""
+    name = 'recency'
+
+    def score(self, candidates):
+        return [-age for age in candidates.age_hours]
+
+
+class EngagementScorer(Scorer):
+    """log-engagement x recency decay x relationship strength."""
+    name = 'engagement'
+
+    def __init__(self, half_life_hours=None, weights=None):
+        self.half_life_hours = half_life_hours or getattr(settings, 'FEED_RANK_HALF_LIFE_HOURS', 12)
+        self.weights = weights or getattr(settings, 'FEED_RANK_RELATIONSHIP_WEIGHTS', DEFAULT_RELATIONSHIP_WEIGHTS)
+
+    def score(self, candidates):
+        decay_rate = math.log(2) / self.half_life_hours
+        engagement = [
+            math.log1p(likes + 2 * comments + 3 * shares)
+            for likes, comments, shares in zip(candidates.likes, candidates.comments, candidates.shares)
+        ]
+        decay = [math.exp(-decay_rate * age) for age in candidates.age_hours]
+        strength = [self.weights.get(rel, 0.0) for rel in candidates.relationships]
+        return [(1 + e) * d * s for e, d, s in zip(engagement, decay, strength)]
+
+
+DEFAULT_SCORERS = {
+    'recency': 'posts.ranking.RecencyScorer',
+    'engagement': 'posts.ranking.EngagementScorer',
+}
+
+
+def available_scorers():
+    return getattr(settings, 'FEED_SCORERS', DEFAULT_SCORERS)
+
+
+def get_scorer(name=None):
+    """Instantiate the scorer called ``name`` (default: ``FEED_SCORER``). Raises KeyError."""
+    name = name or getattr(settings, 'FEED_SCORER', 'engagement')
+    return import_string(available_scorers()[name])()
+
+
+def _relationship_lookup(user):
+    adjacency = graph.load([graph.CONNECTIONS, graph.FOLLOWING], [user.id])
+    connected = set(adjacency[graph.CONNECTIONS][user.id])
+    following = set(adjacency[graph.FOLLOWING][user.id])
+
+    def relationship_of(author_id):
+        if author_id == user.id:
+            return SELF
+        if author_id in connected:
+            return CONNECTED
+        if author_id in following:
+            return FOLLOWING
+        return OTHER
+
+    return relationship_of, connected | following | {user.id}
+
+
+def generate_candidates(user, now):
+    """Load the bounded candidate set as light tuples (no model instances)."""
+    window = timedelta(hours=getattr(settings, 'FEED_RANK_WINDOW_HOURS', 72))
+    per_source = getattr(settings, 'FEED_RANK_MAX_CANDIDATES', 500)
+    relationship_of, graph_ids = _relationship_lookup(user)
+    columns = ('id', 'author_id', 'created_at', 'likes_count', 'comments_count', 'shares_count')
+    recent = Post.objects.filter(created_at__gt=now - window, created_at__lte=now).order_by('-created_at', '-id')
+    graph_rows = list(recent.filter(author_id__in=graph_ids).values_list(*columns)[:per_source])
+    global_rows = list(recent.filter(~Q(author_id__in=graph_ids)).values_list(*columns)[:per_source])
+    return Candidates(graph_rows + global_rows, relationship_of, now)
+
+
+def rank_feed(user, scorer, cursor=None, page_size=20):
+    """Return ``(post_ids, next_cursor, timings)`` for one ranked page.
+
+    Raises ``InvalidCursor`` on a malformed cursor.
+    """
+    if cursor:
+        anchor_ts, after_score, after_id = decode_raw_cursor(cursor, 3)
+        try:
+            now = datetime.fromtimestamp(float(anchor_ts), tz=dt_timezone.utc)
+            after = (float(after_score), int(after_id))
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor('Invalid cursor') from e
+    else:
+        now, after = timezone.now(), None
+
+    started = time.perf_counter()
+    candidates = generate_candidates(user, now)
+    generated = time.perf_counter()
+    scores = scorer.score(candidates)
+    ranked = sorted(zip(scores, candidates.ids), reverse=True)
+    if after:
+        ranked = [item for item in ranked if item < after]
+    scored = time.perf_counter()
+
+    page = ranked[:page_size + 1]
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor([now.timestamp(), page[-1][0], page[-1][1]])
+    timings = {
+        'candidates': len(candidates),
+        'candidate_ms': round((generated - started) * 1000, 2),
+        'scoring_ms': round((scored - generated) * 1000, 2),
+    }
+    logger.info("Ranked feed for user %s with %s", user.id, scorer.name, extra={'feed_rank': timings})
+    return [post_id for _, post_id in page], next_cursor, timings
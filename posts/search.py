@@ -0,0 +1,191 @@
+"""
+Full-text search over post content and comment text.
+
+- SQLite: one FTS5 table (``posts_search_fts``) holding a document per post
+  and per comment, kept current by post/comment signals.
+- PostgreSQL: GIN indexes on ``to_tsvector`` expressions over
+  ``posts_post.content`` and ``posts_comment.text``, maintained by the
+  database.
+
+Score is ``ln(1 + relevance) + created_at / tau``: ordering by it is the same
+as ordering by relevance decayed with a half-life of
+``POST_SEARCH_HALF_LIFE_DAYS``, but it does not depend on "now".
+
+Pages are keyset-paginated on ``(score, key)`` and are best-effort: scores
+are recomputed on every request, so a document edited between two page
+requests moves, and on SQLite ``bm25()`` weighs terms by corpus-wide
+statistics, so any post or comment indexed in between shifts every score a
+little. A later page can then repeat or skip a hit near the boundary;
+clients should drop repeated ``(type, id)`` pairs. PostgreSQL's
+``ts_rank`` is per document, so only edits move hits there.
+"""
+
+import math
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from main.pagination import encode_cursor, decode_raw_cursor, InvalidCursor
+
+FTS_TABLE = 'posts_search_fts'
+POST, COMMENT = 'post', 'comment'
+
+# Keep in sync with the expression indexes created in migration 0007
+PG_POST_DOCUMENT_SQL = "to_tsvector('simple', coalesce(p.content, ''))"
+PG_COMMENT_DOCUMENT_SQL = "to_tsvector('simple', coalesce(c.text, ''))"
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+    return _TOKEN_RE.findall(query.lower())[:8]
+
+
+def _tau():
+    half_life_days = getattr(settings, 'POST_SEARCH_HALF_LIFE_DAYS', 7)
+    return half_life_days * 86400 / math.log(2)
+
+
+def _rowid(doc_type, pk):
+    # Posts and comments share one FTS table; interleave ids so rowids are unique
+    return pk * 2 + (1 if doc_type == COMMENT else 0)
+
+
+# ---- index maintenance (SQLite FTS5) ----
+
+def index_document(doc_type, pk, post_id, author_id, created_at, body):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_rowid(doc_type, pk)])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, doc_type, ref_id, post_id, author_id, created_ts, body) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [_rowid(doc_type, pk), doc_type, pk, post_id, author_id, created_at.timestamp(), body or ''],
+        )
+
+
+def unindex_document(doc_type, pk):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_rowid(doc_type, pk)])
+
+
+def index_post(post):
+    index_document(POST, post.pk, post.pk, post.author_id, post.created_at, post.content)
+
+
+def index_comment(comment):
+    index_document(COMMENT, comment.pk, comment.post_id, comment.user_id, comment.created_at, comment.text)
+
+
+def rebuild_index():
+    """Reindex every post and comment (SQLite only)."""
+    from .models import Post, Comment
+
+    if connection.vendor != 'sqlite':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    count = 0
+    for post in Post.objects.only('pk', 'author_id', 'created_at', 'content').iterator(chunk_size=2000):
+        index_post(post)
+        count += 1
+    for comment in Comment.objects.only('pk', 'post_id', 'user_id', 'created_at', 'text').iterator(chunk_size=2000):
+        index_comment(comment)
+        count += 1
+    return count
+
+
+# ---- querying ----
+
+def _sqlite_search(terms, types, author_ids, after, limit):
+    match = ' '.join(f'"{t}"*' for t in terms)
+    where, params = [], [_tau(), match]
+    if types:
+        where.append(f"doc_type IN ({', '.join(['%s'] * len(types))})")
+        params += list(types)
+    if author_ids:
+        where.append(f"author_id IN ({', '.join(['%s'] * len(author_ids))})")
+        params += list(author_ids)
+    if after:
+        where.append("(score < %s OR (score = %s AND rowid < %s))")
+        params += [after[0], after[0], after[1]]
+    sql = (
+        "SELECT rowid, doc_type, ref_id, score FROM ("
+        f"  SELECT rowid, doc_type, ref_id, author_id, LN(1 - bm25({FTS_TABLE})) + created_ts / %s AS score"
+        f"  FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        ") "
+        + (f"WHERE {' AND '.join(where)} " if where else "")
+        + "ORDER BY score DESC, rowid DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def _postgres_search(terms, types, author_ids, after, limit):
+    tsquery = ' & '.join(f"{t}:*" for t in terms)
+    tau = _tau()
+    parts, params = [], []
+    if not types or POST in types:
+        parts.append(
+            "SELECT p.id * 2 AS key, 'post' AS doc_type, p.id AS ref_id, p.author_id AS author_id, "
+            f"LN(1 + ts_rank({PG_POST_DOCUMENT_SQL}, to_tsquery('simple', %s))) "
+            "+ EXTRACT(EPOCH FROM p.created_at) / %s AS score "
+            f"FROM posts_post p WHERE {PG_POST_DOCUMENT_SQL} @@ to_tsquery('simple', %s)"
+        )
+        params += [tsquery, tau, tsquery]
+    if not types or COMMENT in types:
+        parts.append(
+            "SELECT c.id * 2 + 1 AS key, 'comment' AS doc_type, c.id AS ref_id, c.user_id AS author_id, "
+            f"LN(1 + ts_rank({PG_COMMENT_DOCUMENT_SQL}, to_tsquery('simple', %s))) "
+            "+ EXTRACT(EPOCH FROM c.created_at) / %s AS score "
+            f"FROM posts_comment c WHERE {PG_COMMENT_DOCUMENT_SQL} @@ to_tsquery('simple', %s)"
+        )
+        params += [tsquery, tau, tsquery]
+    where = []
+    if author_ids:
+        where.append(f"author_id IN ({', '.join(['%s'] * len(author_ids))})")
+        params += list(author_ids)
+    if after:
+        where.append("(score < %s OR (score = %s AND key < %s))")
+        params += [after[0], after[0], after[1]]
+    sql = (
+        f"SELECT key, doc_type, ref_id, score FROM ({' UNION ALL '.join(parts)}) docs "
+        + (f"WHERE {' AND '.join(where)} " if where else "")
+        + "ORDER BY score DESC, key DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def search(query, types=None, author_ids=None, cursor=None, page_size=20):
+    """Return ``([(doc_type, ref_id), ...], next_cursor)`` for one page of hits.
+
+    Pages after the first are best-effort when the index changes between
+    requests (see the module docstring). Raises ``InvalidCursor`` on a
+    malformed cursor.
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], None
+    after = None
+    if cursor:
+        after = decode_raw_cursor(cursor, 2)
+        if not all(isinstance(v, (int, float)) for v in after):
+            raise InvalidCursor('Invalid cursor')
+    if connection.vendor == 'sqlite':
+        rows = _sqlite_search(terms, types, author_ids, after, page_size + 1)
+    elif connection.vendor == 'postgresql':
+        rows = _postgres_search(terms, types, author_ids, after, page_size + 1)
+    else:
+        return [], None
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1][3], rows[-1][0]])
+    return [(doc_type, ref_id) for _, doc_type, ref_id, _ in rows], next_cursor
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Post, PostImage, Like, Comment, Share, Story
 from django.contrib.auth import get_user_model
+from main.renditions import rendition_url
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -20,7 +21,7 @@ class AuthorSerializer(serializers.ModelSerializer):
         if not pic:
             return None
         try:
-            url = pic.url
+            url = rendition_url(pic, getattr(obj, 'profile_picture_renditions', None), 'thumb')
         except Exception:
             return None
         
@@ -48,7 +49,10 @@ class StorySerializer(serializers.ModelSerializer):
     def get_media_url(self, obj):
         if not obj.media:
             return None
-        url = obj.media.url
+        if obj.media_type == Story.MediaType.IMAGE:
+            url = rendition_url(obj.media, obj.renditions, 'full')
+        else:
+            url = obj.media.url
         
         # If it's already a full URL (Cloudinary), return as is
         if url.startswith('http'):
@@ -67,7 +71,8 @@ class PostImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'url']
 
     def get_url(self, obj):
-        url = obj.image.url
+        # Feed-sized by default; callers can ask for 'thumb' or 'full' via context
+        url = rendition_url(obj.image, obj.renditions, self.context.get('image_size', 'feed'))
         
         # If it's already a full URL (Cloudinary), return as is
         if url.startswith('http'):
@@ -81,44 +86,50 @@ class PostImageSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     user = AuthorSerializer(source='author', read_only=True)
     image_urls = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
-    shares_count = serializers.SerializerMethodField()
     liked_by_me = serializers.SerializerMethodField()
+    comments_preview = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = [
             'id', 'user', 'content', 'image_urls', 'is_pinned',
             'likes_count', 'comments_count', 'shares_count', 'liked_by_me',
+            'comments_preview', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'user', 'likes_count', 'comments_count', 'shares_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
 
     def get_image_urls(self, obj):
         images = obj.images.all()
         return [PostImageSerializer(img, context=self.context).data['url'] for img in images]
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
-
-    def get_shares_count(self, obj):
-        return obj.shares.count()
-
     def get_liked_by_me(self, obj):
         request = self.context.get('request')
         if not request or not request.user or not request.user.is_authenticated:
             return False
+        # Views resolve the whole page with one query and pass the ids in context
+        liked_ids = self.context.get('liked_post_ids')
+        if liked_ids is not None:
+            return obj.id in liked_ids
         return obj.likes.filter(user=request.user).exists()
 
+    def get_comments_preview(self, obj):
+        # Views fetch previews for the whole page with one windowed query
+        previews = self.context.get('comment_previews')
+        if previews is not None:
+            comments = previews.get(obj.id, [])
+        else:
+            from .comments import comment_previews
+            comments = comment_previews([obj.id])[obj.id]
+        return CommentSerializer(comments, many=True, context=self.context).data
+
 
 class CommentSerializer(serializers.ModelSerializer):
     user = AuthorSerializer(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ['id', 'user', 'text', 'created_at']
-        read_only_fields = ['id', 'user', 'created_at']
+        fields = ['id', 'user', 'text', 'parent', 'replies_count', 'created_at']
+        read_only_fields = ['id', 'user', 'parent', 'replies_count', 'created_at']
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Post, Comment, Hashtag, PostHashtag, PostHashtagRemoval
+from .tags import sync_post_tags
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'content' not in update_fields:
+        return
+    search.index_post(instance)
+    sync_post_tags(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_document(search.POST, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'text' not in update_fields:
+        return
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_document(search.COMMENT, instance.pk)
+
+
+@receiver(post_delete, sender=PostHashtag)
+def queue_trending_removal(sender, instance, origin=None, **kwargs):
+    """Let the trending job take the use back out of the tag's scores."""
+    if getattr(origin, 'model', type(origin)) is Hashtag:
+        return  # the tag's scores go with it
+    PostHashtagRemoval.objects.create(
+        post_hashtag_id=instance.pk, hashtag_id=instance.hashtag_id, created_at=instance.created_at,
+    )
@@ -0,0 +1,97 @@
+"""
+Story retrieval scoped to the viewer's graph, and expiry.
+
+Stories live for ``STORY_TTL_HOURS``. Reads take the viewer's graph
+(self, followed, followers, connections) from the cached adjacency lists
+in accounts.graph, load the stories in one query and group them per author. Expired
+stories are removed, together with their media, by ``purge_expired_stories``.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import graph
+from .models import Story
+from .story_views import seen_story_ids
+
+logger = logging.getLogger(__name__)
+
+
+def story_ttl():
+    return timedelta(hours=getattr(settings, 'STORY_TTL_HOURS', 24))
+
+
+def active_stories_for(user):
+    """Unexpired stories visible to ``user`` as one query (not yet evaluated)."""
+    return (
+        Story.objects
+        .filter(created_at__gte=timezone.now() - story_ttl())
+        .filter(user_id__in=graph.neighbourhood(user.id))
+        .select_related('user')
+        .order_by('user_id', 'created_at')
+    )
+
+
+def group_stories(user, stories):
+    """Group stories per author as ``[(author, stories, has_unseen, seen_ids)]``.
+
+    ``stories`` are oldest first and ``seen_ids`` is the set of story ids
+    the viewer has already opened.
+
+    The viewer's own group comes first, then authors with unseen stories,
+    then by most recent story.
+    """
+    seen = seen_story_ids(user, [s.id for s in stories if s.user_id != user.id])
+    # The viewer has always seen their own stories
+    seen.update(s.id for s in stories if s.user_id == user.id)
+    groups = {}
+    for story in stories:
+        groups.setdefault(story.user_id, []).append(story)
+    result = []
+    for items in groups.values():
+        has_unseen = any(s.id not in seen for s in items)
+        result.append((items[0].user, items, has_unseen, seen))
+    result.sort(key=lambda g: (g[0].id != user.id, not g[2], -g[1][-1].created_at.timestamp()))
+    return result
+
+
+def _story_files(story):
+    names = []
+    if story.media:
+        names.append(story.media.name)
+    names.extend((story.renditions or {}).values())
+    return names
+
+
+def purge_expired_stories(batch_size=500, now=None):
+    """Delete expired stories in batches, then their media from storage.
+
+    Files are removed after each batch commits, so a storage error never
+    leaves a row pointing at a deleted file. Returns ``(rows, files)``.
+    """
+    cutoff = (now or timezone.now()) - story_ttl()
+    storage = Story._meta.get_field('media').storage
+    rows_deleted = files_deleted = 0
+    while True:
+        batch = list(
+            Story.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at')
+            .only('id', 'media', 'renditions')[:batch_size]
+        )
+        if not batch:
+            break
+        names = [name for story in batch for name in _story_files(story)]
+        with transaction.atomic():
+            Story.objects.filter(id__in=[s.id for s in batch]).delete()
+        rows_deleted += len(batch)
+        for name in names:
+            try:
+                storage.delete(name)
+                files_deleted += 1
+            except Exception:
+                logger.exception("Failed to delete story media %s", name)
+    return rows_deleted, files_deleted
@@ -0,0 +1,150 @@
+"""
+Buffered story-view writer.
+
+Opening a story only appends ``(story_id, user_id, viewed_at)`` to an
+in-process buffer. The buffer is flushed with one
+``bulk_create(ignore_conflicts=True)`` when it holds
+``STORY_VIEW_BUFFER_SIZE`` events, by a timer ``STORY_VIEW_FLUSH_SECONDS``
+after its first event, and at interpreter exit. Each flush then
+recomputes ``Story.views_count`` for the stories it touched in one UPDATE.
+A failed flush is logged and its events are kept, so it never fails the
+viewer request that happened to trigger it.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Story, StoryView
+
+logger = logging.getLogger(__name__)
+
+
+class StoryViewBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = {}
+        self._timer = None
+
+    def _max_size(self):
+        return getattr(settings, 'STORY_VIEW_BUFFER_SIZE', 200)
+
+    def _max_age(self):
+        return getattr(settings, 'STORY_VIEW_FLUSH_SECONDS', 5)
+
+    def record(self, story_id, user_id):
+        """Buffer one view; flushes if the size threshold is reached.
+
+        The first view into an empty buffer arms a timer, so the age
+        threshold holds even if no further views arrive.
+        """
+        with self._lock:
+            # First view wins; repeated opens of the same story are dropped here
+            self._events.setdefault((story_id, user_id), timezone.now())
+            if self._timer is None:
+                self._arm_timer()
+            due = len(self._events) >= self._max_size()
+        if due:
+            self.flush()
+
+    def _arm_timer(self):
+        self._timer = threading.Timer(self._max_age(), self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own connection; don't leak it
+            connection.close()
+
+    def pending(self, user_id, story_ids):
+        """Buffered (not yet flushed) story ids among ``story_ids`` viewed by ``user_id``."""
+        story_ids = set(story_ids)
+        with self._lock:
+            return {sid for (sid, uid) in self._events if uid == user_id and sid in story_ids}
+
+    def _requeue(self, events):
+        """Put events from a failed flush back, unless the buffer is already far over size."""
+        with self._lock:
+            if len(self._events) + len(events) > self._max_size() * 10:
+                logger.error("Dropping %d story views: buffer is full", len(events))
+                return
+            for key, at in events.items():
+                self._events[key] = min(at, self._events.get(key, at))
+            if self._timer is None:
+                self._arm_timer()
+
+    def flush(self):
+        """Write buffered views and refresh the counters of affected stories.
+
+        Views of stories (or by users) deleted since they were buffered are
+        dropped. Never raises: on a database error the events go back into
+        the buffer for the next flush. Returns the number of views written.
+        """
+        with self._lock:
+            events, self._events = self._events, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return 0
+        try:
+            with transaction.atomic():
+                story_ids = set(Story.objects.filter(id__in={sid for sid, _ in events}).values_list('id', flat=True))
+                user_ids = set(
+                    get_user_model().objects.filter(id__in={uid for _, uid in events}).values_list('id', flat=True)
+                )
+                views = [
+                    StoryView(story_id=sid, user_id=uid, viewed_at=at)
+                    for (sid, uid), at in events.items() if sid in story_ids and uid in user_ids
+                ]
+                StoryView.objects.bulk_create(views, ignore_conflicts=True)
+                counts = (
+                    StoryView.objects.filter(story=OuterRef('pk'))
+                    .order_by().values('story').annotate(c=Count('*')).values('c')
+                )
+                Story.objects.filter(id__in=story_ids).update(
+                    views_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+                )
+        except Exception:
+            logger.exception("Failed to flush %d story views; keeping them for the next flush", len(events))
+            self._requeue(events)
+            return 0
+        return len(views)
+
+
+buffer = StoryViewBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush story views at exit")
+
+
+def record_view(story, user):
+    if story.user_id == user.id:
+        return
+    buffer.record(story.id, user.id)
+
+
+def seen_story_ids(user, story_ids):
+    """Story ids the user has viewed: one indexed lookup plus the local buffer."""
+    story_ids = list(story_ids)
+    if not story_ids:
+        return set()
+    seen = set(
+        StoryView.objects.filter(user=user, story_id__in=story_ids).values_list('story_id', flat=True)
+    )
+    return seen | buffer.pending(user.id, story_ids)
@@ -0,0 +1,243 @@
+"""
+Seeded synthetic social-graph data for load tests and benchmarks.
+
+``generate`` builds users with a power-law follower graph (a few accounts
+are followed by most people, most accounts by a handful), then posts,
+likes, comments with replies, stories and chat threads, all inserted with
+``bulk_create``. Popular authors post and get engaged with more. The same
+seed always produces the same dataset.
+
+Since ``bulk_create`` bypasses signals, the derived data (counters, search
+indexes, tags, home timelines, trending scores, suggestions) is rebuilt at
+the end with the same code the maintenance commands use.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import graph, search as user_search, suggestions
+from chat.conversations import canonical_pair
+from chat.models import Conversation, ConversationParticipant, Message
+from . import search as post_search
+from .counters import recount_post_counters
+from .models import Post, Like, Comment, Share, Story, Hashtag, PostHashtag
+from .tags import extract_hashtags, update_trending
+from .timeline import fanout_post, timeline_audience
+
+BATCH_SIZE = 1000
+
+FIRST_NAMES = ['Ava', 'Liam', 'Maya', 'Noah', 'Zara', 'Omar', 'Lena', 'Ravi', 'Sofia', 'Kenji', 'Amara', 'Diego']
+LAST_NAMES = ['Khan', 'Smith', 'Garcia', 'Chen', 'Okafor', 'Rossi', 'Silva', 'Novak', 'Haddad', 'Ito', 'Ahmed', 'Berg']
+WORDS = (
+    'coffee travel sunset music coding weekend design football garden recipe city photo '
+    'mountain startup reading concert coastline festival workout podcast launch beta release'
+).split()
+TAGS = ['travel', 'food', 'tech', 'music', 'sports', 'art', 'news', 'photography', 'fitness', 'books']
+COLORS = ['#4f46e5', '#db2777', '#059669', '#d97706', '#0891b2']
+
+
+def _sentence(rng, low=4, high=14):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _zipf_weights(n, alpha):
+    return [1.0 / (rank + 1) ** alpha for rank in range(n)]
+
+
+def _sample_distinct(rng, population, weights, k, exclude=None):
+    """Up to ``k`` distinct weighted picks from ``population``."""
+    chosen = set()
+    for candidate in rng.choices(population, weights=weights, k=k * 3):
+        if candidate != exclude:
+            chosen.add(candidate)
+            if len(chosen) >= k:
+                break
+    return chosen
+
+
+def _spread(rng, now, seconds):
+    return now - timedelta(seconds=rng.uniform(0, seconds))
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the ``created_at`` set on the instances.
+
+    ``auto_now_add`` would overwrite it with "now"; switching it off while
+    inserting is much cheaper than a ``bulk_update`` afterwards.
+    """
+    fields = [
+        f for model in models for f in model._meta.concrete_fields
+        if getattr(f, 'auto_now_add', False)
+    ]
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f in fields:
+            f.auto_now_add = True
+
+
+def generate(users=500, posts_per_user=5, days=14, seed=42, alpha=1.1, stdout=None):
+    """Insert a synthetic dataset and return a dict of row counts."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    log = stdout.write if stdout else (lambda msg: None)
+    User = get_user_model()
+
+    with transaction.atomic(), _explicit_timestamps(Post, Comment, Story, Message):
+        # Users, in a random popularity order
+        password = make_password('password')
+        prefix = f'synthetic{seed}_'
+        User.objects.bulk_create([
+            User(
+                username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                bio=_sentence(rng, 3, 10), location=rng.choice(['Dhaka', 'Lagos', 'Lisbon', 'Osaka', 'Austin']),
+                is_email_verified=True,
+            )
+            for i in range(users)
+        ], batch_size=BATCH_SIZE)
+        user_ids = list(User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+        rng.shuffle(user_ids)
+        popularity = _zipf_weights(len(user_ids), alpha)
+        weight_of = dict(zip(user_ids, popularity))
+        log(f"Created {len(user_ids)} users")
+
+        # Power-law follower graph. Through rows (from_user=Y, to_user=X) mean X follows Y.
+        Follow = User.followers.through
+        Connection = User.connections.through
+        follows, connections = [], []
+        for follower in user_ids:
+            out_degree = min(len(user_ids) - 1, max(1, int(rng.paretovariate(1.2) * 3)))
+            for target in _sample_distinct(rng, user_ids, popularity, out_degree, exclude=follower):
+                follows.append(Follow(from_user_id=target, to_user_id=follower))
+                if rng.random() < 0.1:
+                    connections.append(Connection(from_user_id=target, to_user_id=follower))
+                    connections.append(Connection(from_user_id=follower, to_user_id=target))
+        Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        Connection.objects.bulk_create(connections, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        log(f"Created {len(follows)} follows and {len(connections) // 2} connections")
+
+        # Posts: popular authors post more; created_at is spread over ``days``
+        span = days * 86400
+        posts = []
+        for _ in range(users * posts_per_user):
+            content = _sentence(rng)
+            if rng.random() < 0.4:
+                content += f' #{rng.choice(TAGS)}'
+            posts.append(Post(
+                author_id=rng.choices(user_ids, weights=popularity)[0], content=content,
+                created_at=_spread(rng, now, span),
+            ))
+        Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        log(f"Created {len(posts)} posts")
+
+        # Engagement proportional to author popularity
+        likes, comments, shares = [], [], []
+        for post in posts:
+            reach = weight_of[post.author_id] * len(user_ids) ** 0.5
+            for liker in _sample_distinct(rng, user_ids, None, int(rng.expovariate(1.0) * reach * 3) + 1):
+                likes.append(Like(post=post, user_id=liker))
+            for _ in range(int(rng.expovariate(1.0) * reach)):
+                comments.append(Comment(
+                    post=post, user_id=rng.choice(user_ids), text=_sentence(rng, 2, 12),
+                    created_at=min(now, post.created_at + timedelta(seconds=rng.uniform(0, 86400))),
+                ))
+            if rng.random() < reach / 4:
+                shares.append(Share(post=post, user_id=rng.choice(user_ids)))
+        # One level of replies under a fifth of the comments
+        replies = []
+        for parent in rng.sample(comments, len(comments) // 5):
+            for _ in range(rng.randint(1, 3)):
+                replies.append(Comment(
+                    post=parent.post, parent=parent, user_id=rng.choice(user_ids), text=_sentence(rng, 2, 8),
+                    created_at=min(now, parent.created_at + timedelta(seconds=rng.uniform(0, 3600))),
+                ))
+                parent.replies_count += 1
+        Like.objects.bulk_create(likes, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        Comment.objects.bulk_create(replies, batch_size=BATCH_SIZE)
+        Share.objects.bulk_create(shares, batch_size=BATCH_SIZE)
+        all_comments = comments + replies
+        log(f"Created {len(likes)} likes, {len(all_comments)} comments and {len(shares)} shares")
+
+        # Active stories for about a third of the users
+        stories = [
+            Story(
+                user_id=uid, content=_sentence(rng, 2, 8), background_color=rng.choice(COLORS),
+                created_at=_spread(rng, now, 12 * 3600),
+            )
+            for uid in user_ids if rng.random() < 0.33
+            for _ in range(rng.randint(1, 3))
+        ]
+        Story.objects.bulk_create(stories, batch_size=BATCH_SIZE)
+
+        # Chat threads along follow edges
+        pairs = {canonical_pair(f.from_user_id, f.to_user_id) for f in rng.sample(follows, min(len(follows), users * 2))}
+        conversations = [Conversation(user_low_id=low, user_high_id=high) for low, high in sorted(pairs)]
+        Conversation.objects.bulk_create(conversations, batch_size=BATCH_SIZE)
+        messages = []
+        for conv in conversations:
+            sent_at = _spread(rng, now, span)
+            for _ in range(rng.randint(1, 30)):
+                sender, receiver = (conv.user_low_id, conv.user_high_id) if rng.random() < 0.5 else (conv.user_high_id, conv.user_low_id)
+                sent_at = min(now, sent_at + timedelta(minutes=rng.uniform(1, 60)))
+                messages.append(Message(
+                    conversation=conv, sender_id=sender, receiver_id=receiver,
+                    user_low_id=conv.user_low_id, user_high_id=conv.user_high_id, text=_sentence(rng, 1, 12),
+                    created_at=sent_at, read_at=sent_at,
+                ))
+        Message.objects.bulk_create(messages, batch_size=BATCH_SIZE)
+        last_messages = {}
+        for m in messages:
+            last_messages[m.conversation_id] = m
+        participants = []
+        for conv in conversations:
+            conv.last_message = last_messages[conv.pk]
+            conv.last_activity = conv.last_message.created_at
+            participants += [
+                ConversationParticipant(conversation=conv, user_id=uid, last_activity=conv.last_activity)
+                for uid in (conv.user_low_id, conv.user_high_id)
+            ]
+        Conversation.objects.bulk_update(conversations, ['last_message', 'last_activity'], batch_size=BATCH_SIZE)
+        ConversationParticipant.objects.bulk_create(participants, batch_size=BATCH_SIZE)
+        log(f"Created {len(stories)} stories, {len(conversations)} conversations and {len(messages)} messages")
+
+        # Tags straight from the generated content
+        Hashtag.objects.bulk_create([Hashtag(name=t) for t in TAGS], ignore_conflicts=True)
+        tag_ids = dict(Hashtag.objects.filter(name__in=TAGS).values_list('name', 'id'))
+        PostHashtag.objects.bulk_create([
+            PostHashtag(post=post, hashtag_id=tag_ids[name], created_at=post.created_at)
+            for post in posts for name in extract_hashtags(post.content)
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    # bulk_create skips the m2m signals that keep the cached graph current
+    graph.invalidate(*user_ids)
+
+    # Derived data, rebuilt the same way the maintenance commands do
+    with transaction.atomic():
+        recount_post_counters(Post, Like, Comment, Share, queryset=Post.objects.filter(pk__in=[p.pk for p in posts]))
+        post_search.rebuild_index()
+        user_search.rebuild_index()
+        audiences = {}
+        for post in sorted(posts, key=lambda p: p.created_at):
+            if post.author_id not in audiences:
+                audiences[post.author_id] = timeline_audience(post.author_id)
+            fanout_post(post, audiences[post.author_id])
+    update_trending(settle_seconds=0)
+    suggestions.refresh_all()
+    log("Rebuilt counters, search indexes, timelines, trending tags and suggestions")
+
+    return {
+        'users': len(user_ids), 'follows': len(follows), 'posts': len(posts), 'likes': len(likes),
+        'comments': len(all_comments), 'shares': len(shares), 'stories': len(stories),
+        'conversations': len(conversations), 'messages': len(messages),
+    }
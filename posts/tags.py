@@ -0,0 +1,191 @@
+"""
+Hashtag / mention extraction and trending tags.
+
+Tags and mentions are parsed from ``Post.content`` on every content save and
+stored in ``PostHashtag`` / ``Mention``. Trending uses forward decay: each
+tag use adds ``exp((t - TREND_EPOCH) / tau)`` to the tag's score for a
+window, kept in log space in ``TrendingScore.log_score``. The periodic
+``update_trending_tags`` command folds in uses newer than its checkpoint
+and subtracts removed ones (``PostHashtagRemoval``, queued by a delete
+signal), so requests only read the top rows of an index.
+"""
+
+import math
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Hashtag, PostHashtag, PostHashtagRemoval, Mention, TrendingScore, TrendingCheckpoint
+
+HASHTAG_RE = re.compile(r'(?<![\w#])#(\w{1,64})', re.UNICODE)
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})', re.UNICODE)
+
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+DEFAULT_TRENDING_WINDOWS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+
+def trending_windows():
+    """Window name -> decay half-life in seconds."""
+    return getattr(settings, 'TRENDING_WINDOWS', DEFAULT_TRENDING_WINDOWS)
+
+
+def extract_hashtags(text):
+    return {tag.lower() for tag in HASHTAG_RE.findall(text or '')}
+
+
+def extract_mentions(text):
+    return {name.rstrip('.') for name in MENTION_RE.findall(text or '')}
+
+
+def sync_post_tags(post):
+    """Make the post's PostHashtag and Mention rows match its content."""
+    names = extract_hashtags(post.content)
+    usernames = extract_mentions(post.content)
+    with transaction.atomic():
+        if names:
+            Hashtag.objects.bulk_create([Hashtag(name=n) for n in names], ignore_conflicts=True)
+        tag_ids = set(Hashtag.objects.filter(name__in=names).values_list('id', flat=True)) if names else set()
+        existing = set(PostHashtag.objects.filter(post=post).values_list('hashtag_id', flat=True))
+        PostHashtag.objects.filter(post=post, hashtag_id__in=existing - tag_ids).delete()
+        PostHashtag.objects.bulk_create(
+            [PostHashtag(post=post, hashtag_id=tid, created_at=post.created_at) for tid in tag_ids - existing],
+            ignore_conflicts=True,
+        )
+
+        User = get_user_model()
+        user_ids = set(User.objects.filter(username__in=usernames).values_list('id', flat=True)) if usernames else set()
+        existing = set(Mention.objects.filter(post=post).values_list('user_id', flat=True))
+        Mention.objects.filter(post=post, user_id__in=existing - user_ids).delete()
+        Mention.objects.bulk_create(
+            [Mention(post=post, user_id=uid, created_at=post.created_at) for uid in user_ids - existing],
+            ignore_conflicts=True,
+        )
+
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def _logsubexp(a, b):
+    """log(exp(a) - exp(b)), or None when nothing meaningful is left."""
+    remaining = -math.expm1(b - a)
+    if remaining <= 1e-9:
+        return None
+    return a + math.log(remaining)
+
+
+def _log_weights(created_at, windows):
+    age = (created_at - TREND_EPOCH).total_seconds()
+    return {window: age * math.log(2) / half_life for window, half_life in windows.items()}
+
+
+def _apply(additions, subtractions):
+    """Fold ``{(window, hashtag_id): log_value}`` deltas into TrendingScore."""
+    touched = set(additions) | set(subtractions)
+    if not touched:
+        return
+    current = {
+        (s.window, s.hashtag_id): s
+        for s in TrendingScore.objects.select_for_update().filter(hashtag_id__in={h for _, h in touched})
+    }
+    emptied = set()
+    for key, value in additions.items():
+        score = current.get(key)
+        if score is None:
+            current[key] = TrendingScore(window=key[0], hashtag_id=key[1], log_score=value)
+        else:
+            score.log_score = _logaddexp(score.log_score, value)
+    for key, value in subtractions.items():
+        score = current.get(key)
+        if score is None:
+            continue
+        score.log_score = _logsubexp(score.log_score, value)
+        if score.log_score is None:
+            emptied.add(key)
+    scores = [(key, current[key]) for key in touched if key in current]
+    TrendingScore.objects.bulk_create([s for key, s in scores if s.pk is None and key not in emptied])
+    TrendingScore.objects.bulk_update(
+        [s for key, s in scores if s.pk is not None and key not in emptied], ['log_score', 'updated_at'],
+    )
+    TrendingScore.objects.filter(pk__in=[current[key].pk for key in emptied if current[key].pk]).delete()
+
+
+def _take_removals(folded_before, folded_ids, windows):
+    """Claim queued removals and return the decrements for uses that were folded.
+
+    A removed use was folded if its id is at or below the checkpoint this
+    batch started from, or was read in this batch. Otherwise it was deleted
+    before the job saw it, and the checkpoint will pass it without counting it.
+    """
+    decrements = defaultdict(lambda: None)
+    removals = list(PostHashtagRemoval.objects.select_for_update().order_by('id'))
+    for removal in removals:
+        if removal.post_hashtag_id <= folded_before or removal.post_hashtag_id in folded_ids:
+            for window, value in _log_weights(removal.created_at, windows).items():
+                key = (window, removal.hashtag_id)
+                decrements[key] = _logaddexp(decrements[key], value)
+    PostHashtagRemoval.objects.filter(pk__in=[r.pk for r in removals]).delete()
+    return decrements
+
+
+def update_trending(batch_size=5000, settle_seconds=30):
+    """Fold PostHashtag rows past the checkpoint into TrendingScore, and
+    subtract uses that were removed since.
+
+    Rows are read in id order and the batch stops at the first row added
+    less than ``settle_seconds`` ago: the checkpoint never passes it, so a
+    slow transaction committing a lower id in the meantime is not skipped.
+    Returns the number of tag uses added.
+    """
+    windows = trending_windows()
+    processed = 0
+    while True:
+        horizon = timezone.now() - timedelta(seconds=settle_seconds)
+        with transaction.atomic():
+            checkpoint, _ = TrendingCheckpoint.objects.select_for_update().get_or_create(pk=1)
+            folded_before = checkpoint.last_post_hashtag_id
+            uses = []
+            for use in (
+                PostHashtag.objects
+                .filter(id__gt=folded_before)
+                .order_by('id')
+                .values_list('id', 'hashtag_id', 'created_at', 'added_at')[:batch_size]
+            ):
+                if use[3] > horizon:
+                    break
+                uses.append(use)
+            increments = defaultdict(lambda: None)
+            for _, hashtag_id, created_at, _ in uses:
+                for window, value in _log_weights(created_at, windows).items():
+                    key = (window, hashtag_id)
+                    increments[key] = _logaddexp(increments[key], value)
+            decrements = _take_removals(folded_before, {use[0] for use in uses}, windows)
+            _apply(increments, decrements)
+            if uses:
+                checkpoint.last_post_hashtag_id = uses[-1][0]
+                checkpoint.save(update_fields=['last_post_hashtag_id', 'updated_at'])
+        processed += len(uses)
+        if len(uses) < batch_size:
+            break
+    return processed
+
+
+def trending_tags(window, limit=10):
+    """Top tags for ``window`` as ``[(name, decayed_score)]``, read from the index."""
+    half_life = trending_windows()[window]
+    now_offset = (timezone.now() - TREND_EPOCH).total_seconds() * math.log(2) / half_life
+    rows = (
+        TrendingScore.objects
+        .filter(window=window)
+        .select_related('hashtag')
+        .order_by('-log_score')[:limit]
+    )
+    return [(row.hashtag.name, math.exp(row.log_score - now_offset)) for row in rows]
@@ -1,3 +1,338 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import User
+from main.renditions import process_renditions
+from main.testing import QueryBudgetMixin
+from .likes import like_post, unlike_post
+from .models import Post, PostImage, Like, Comment, PostHashtag, Story, StoryView, TrendingCheckpoint
+from .story_views import StoryViewBuffer
+from .synthetic import generate
+from .tags import trending_tags, update_trending
+from .timeline import fanout_post
+
+
+class ConcurrentLikeTests(TransactionTestCase):
+    workers = 8
+    repeats = 3
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.post = Post.objects.create(author=self.author, content='hammered')
+        self.users = [
+            User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='x')
+            for i in range(self.workers)
+        ]
+
+    def _hammer(self, action, user_ids):
+        """Run ``action(post_id, user_id)`` ``repeats`` times per user from many threads at once."""
+        barrier = threading.Barrier(len(user_ids) * self.repeats)
+        errors = []
+
+        def worker(user_id):
+            try:
+                barrier.wait()
+                action(self.post.pk, user_id)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(user_id,))
+            for user_id in user_ids
+            for _ in range(self.repeats)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def assertCounterMatches(self, expected):
+        self.post.refresh_from_db(fields=['likes_count'])
+        self.assertEqual(Like.objects.filter(post=self.post).count(), expected)
+        self.assertEqual(self.post.likes_count, expected)
+
+    def test_concurrent_likes_are_idempotent(self):
+        self._hammer(like_post, [u.pk for u in self.users])
+        self.assertCounterMatches(self.workers)
+
+    def test_concurrent_unlikes_are_idempotent(self):
+        for u in self.users:
+            like_post(self.post.pk, u.pk)
+        self._hammer(unlike_post, [u.pk for u in self.users[: self.workers // 2]])
+        self.assertCounterMatches(self.workers - self.workers // 2)
+
+    def test_repeated_like_reports_denormalized_count(self):
+        self.assertEqual(like_post(self.post.pk, self.users[0].pk), (True, 1))
+        self.assertEqual(like_post(self.post.pk, self.users[0].pk), (False, 1))
+        self.assertEqual(unlike_post(self.post.pk, self.users[0].pk), (True, 0))
+        self.assertEqual(unlike_post(self.post.pk, self.users[0].pk), (False, 0))
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Feed endpoints must not grow queries with page size (no N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        authors = [
+            User.objects.create_user(username=f'author{i}', email=f'author{i}@example.com', password='x')
+            for i in range(5)
+        ]
+        for author in authors:
+            cls.viewer.following.add(author)
+            author.followers.add(cls.viewer)
+        for i in range(30):
+            author = authors[i % len(authors)]
+            post = Post.objects.create(author=author, content=f'post {i} #budget')
+            fanout_post(post)
+            like_post(post.pk, cls.viewer.pk)
+            comment = Comment.objects.create(post=post, user=authors[0], text='first')
+            Comment.objects.create(post=post, user=authors[1], text='reply', parent=comment)
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+
+    def assertEndpointBudget(self, path, max_queries):
+        for page_size in (2, 25):
+            response = self.client.get(path, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), page_size)
+            self.assertQueryBudget(response, max_queries)
+
+    def test_feed_budget(self):
+        self.assertEndpointBudget('/api/posts/', 6)
+
+    def test_home_feed_budget(self):
+        self.assertEndpointBudget('/api/posts/home/', 8)
+
+    def test_ranked_feed_budget(self):
+        self.assertEndpointBudget('/api/posts/ranked/', 10)
+
+    def test_tag_feed_budget(self):
+        self.assertEndpointBudget('/api/posts/tags/budget/', 7)
+
+    def test_comments_budget(self):
+        post = Post.objects.first()
+        for i in range(30):
+            Comment.objects.create(post=post, user=self.viewer, text=f'comment {i}')
+        self.assertEndpointBudget(f'/api/posts/{post.pk}/comments/', 4)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_counters_match_rows(self):
+        counts = generate(users=30, posts_per_user=3, seed=7)
+        self.assertEqual(counts['posts'], 90)
+        for post in Post.objects.filter(author__username__startswith='synthetic7_'):
+            self.assertEqual(post.likes_count, post.likes.count())
+            self.assertEqual(post.comments_count, post.comments.count())
+        for comment in Comment.objects.filter(parent__isnull=True, replies_count__gt=0):
+            self.assertEqual(comment.replies_count, comment.replies.count())
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.client.force_login(self.author)
+
+    def search(self, q, **params):
+        response = self.client.get('/api/posts/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def hits(self, q):
+        return [r['post']['id'] if r['type'] == 'post' else r['comment']['id'] for r in self.search(q)['results']]
+
+    def test_pages_cover_every_hit_once(self):
+        posts = [Post.objects.create(author=self.author, content=f'sunset number {i}') for i in range(5)]
+        Comment.objects.create(post=posts[0], user=self.author, text='what a sunset')
+        first = self.search('sunset', page_size=4)
+        self.assertEqual(len(first['results']), 4)
+        second = self.search('sunset', page_size=4, cursor=first['next_cursor'])
+        self.assertIsNone(second['next_cursor'])
+        seen = [(r['type'], (r.get('post') or r.get('comment'))['id']) for r in first['results'] + second['results']]
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+        self.assertEqual(self.client.get('/api/posts/search/', {'q': 'sunset', 'cursor': 'x'}).status_code, 400)
+
+    def test_index_follows_create_edit_delete(self):
+        post = Post.objects.create(author=self.author, content='harbour lights')
+        self.assertEqual(self.hits('harbour'), [post.pk])
+
+        post.content = 'mountain lights'
+        post.save()
+        self.assertEqual(self.hits('harbour'), [])
+        self.assertEqual(self.hits('mountain'), [post.pk])
+
+        self.assertEqual(self.client.delete(f'/api/posts/{post.pk}/').status_code, 204)
+        self.assertEqual(self.hits('mountain'), [])
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='x')
+
+    def post(self, content, age=timedelta(0)):
+        post = Post.objects.create(author=self.author, content=content)
+        if age:
+            created_at = timezone.now() - age
+            Post.objects.filter(pk=post.pk).update(created_at=created_at)
+            PostHashtag.objects.filter(post=post).update(created_at=created_at)
+        return post
+
+    def scores(self, window='hour'):
+        return dict(trending_tags(window))
+
+    def checkpoint(self):
+        return TrendingCheckpoint.objects.get(pk=1).last_post_hashtag_id
+
+    def test_checkpoint_stops_at_first_unsettled_row(self):
+        fresh = self.post('just posted #fresh')
+        # An edit tags an old post: higher id, old created_at, just added
+        edited = self.post('old post', age=timedelta(days=2))
+        edited.content = 'old post #edited'
+        edited.save()
+        PostHashtag.objects.filter(post=edited).update(added_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(update_trending(settle_seconds=30), 0)
+        self.assertEqual(self.checkpoint(), 0)
+
+        PostHashtag.objects.filter(post=fresh).update(added_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(update_trending(settle_seconds=30), 2)
+        self.assertEqual(self.checkpoint(), PostHashtag.objects.get(post=edited).pk)
+        self.assertEqual(set(self.scores('week')), {'fresh', 'edited'})
+
+    def test_settle_window_uses_insert_time(self):
+        self.post('backdated #late', age=timedelta(days=1))
+        self.assertEqual(update_trending(settle_seconds=30), 0)
+        self.assertEqual(update_trending(settle_seconds=0), 1)
+        self.assertEqual(update_trending(settle_seconds=0), 0)
+
+    def test_scores_decay_with_age(self):
+        self.post('#now')
+        self.post('#earlier', age=timedelta(hours=1))
+        update_trending(settle_seconds=0)
+        scores = self.scores('hour')
+        self.assertAlmostEqual(scores['now'], 1.0, places=2)
+        self.assertAlmostEqual(scores['earlier'], 0.5, places=2)
+
+    def test_removed_uses_lower_the_score(self):
+        first = self.post('#topic')
+        second = self.post('#topic again')
+        update_trending(settle_seconds=0)
+        self.assertAlmostEqual(self.scores()['topic'], 2.0, places=2)
+
+        second.delete()
+        update_trending(settle_seconds=0)
+        self.assertAlmostEqual(self.scores()['topic'], 1.0, places=2)
+
+        first.content = 'no tags any more'
+        first.save()
+        update_trending(settle_seconds=0)
+        self.assertNotIn('topic', self.scores())
+
+    def test_use_removed_before_folding_is_not_subtracted(self):
+        self.post('#topic')
+        update_trending(settle_seconds=0)
+        self.post('#topic short lived').delete()
+        update_trending(settle_seconds=0)
+        self.assertAlmostEqual(self.scores()['topic'], 1.0, places=2)
+
+
+@override_settings(STORY_VIEW_BUFFER_SIZE=3, STORY_VIEW_FLUSH_SECONDS=60)
+class StoryViewBufferTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.viewers = [
+            User.objects.create_user(username=f'viewer{i}', email=f'viewer{i}@example.com', password='x')
+            for i in range(3)
+        ]
+        self.stories = [Story.objects.create(user=self.author, content=f'story {i}') for i in range(2)]
+        self.buffer = StoryViewBuffer()
+        self.addCleanup(lambda: self.buffer._timer and self.buffer._timer.cancel())
+
+    def test_flushes_at_size_threshold(self):
+        story = self.stories[0]
+        self.buffer.record(story.pk, self.viewers[0].pk)
+        self.buffer.record(story.pk, self.viewers[0].pk)  # repeat open, same event
+        self.buffer.record(story.pk, self.viewers[1].pk)
+        self.assertFalse(StoryView.objects.exists())
+        self.assertEqual(self.buffer.pending(self.viewers[1].pk, [story.pk]), {story.pk})
+        self.buffer.record(story.pk, self.viewers[2].pk)
+        self.assertEqual(StoryView.objects.filter(story=story).count(), 3)
+        story.refresh_from_db()
+        self.assertEqual(story.views_count, 3)
+        self.assertEqual(self.buffer.pending(self.viewers[1].pk, [story.pk]), set())
+
+    def test_views_of_deleted_stories_are_dropped(self):
+        kept, purged = self.stories
+        self.buffer.record(kept.pk, self.viewers[0].pk)
+        self.buffer.record(purged.pk, self.viewers[0].pk)
+        purged.delete()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(list(StoryView.objects.values_list('story_id', flat=True)), [kept.pk])
+
+    def test_failed_flush_keeps_events(self):
+        story = self.stories[0]
+        self.buffer.record(story.pk, self.viewers[0].pk)
+        with mock.patch.object(StoryView.objects, 'bulk_create', side_effect=RuntimeError('db down')), \
+                self.assertLogs('posts.story_views', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending(self.viewers[0].pk, [story.pk]), {story.pk})
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(StoryView.objects.filter(story=story, user=self.viewers[0]).exists())
+
+
+class StoryViewBufferTimerTests(TransactionTestCase):
+    @override_settings(STORY_VIEW_BUFFER_SIZE=100, STORY_VIEW_FLUSH_SECONDS=0.1)
+    def test_quiet_buffer_flushes_on_timer(self):
+        author = User.objects.create_user(username='author', email='author@example.com', password='x')
+        viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        story = Story.objects.create(user=author, content='quiet')
+        buffer = StoryViewBuffer()
+        buffer.record(story.pk, viewer.pk)
+        deadline = time.monotonic() + 5
+        while not StoryView.objects.filter(story=story).exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(StoryView.objects.filter(story=story, user=viewer).exists())
+
+
+class RenditionCacheTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.settings_override = override_settings(MEDIA_ROOT=media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.client.force_login(self.author)
+
+    def png(self):
+        out = io.BytesIO()
+        Image.new('RGB', (64, 64), 'red').save(out, format='PNG')
+        return SimpleUploadedFile('photo.png', out.getvalue(), content_type='image/png')
+
+    def test_renditions_refresh_cache_without_touching_updated_at(self):
+        post = Post.objects.create(author=self.author, content='with a photo')
+        image = PostImage.objects.create(post=post, image=self.png())
+        before = self.client.get(f'/api/posts/{post.pk}/').json()
+        self.assertTrue(before['image_urls'][0].endswith('.png'))
+
+        process_renditions('posts.PostImage', image.pk, 'image', 'renditions')
+
+        after = self.client.get(f'/api/posts/{post.pk}/').json()
+        self.assertTrue(after['image_urls'][0].endswith('.webp'))
+        self.assertEqual(after['updated_at'], before['updated_at'])
@@ -0,0 +1,94 @@
+"""
+Home timeline store (fan-out-on-write).
+
+Creating a post copies its id into the ``TimelineEntry`` rows of the author,
+their followers and their connections, so reading a home feed is a range
+scan on ``(user, created_at, post)``. Authors with more followers than
+``TIMELINE_FANOUT_MAX_FOLLOWERS`` only fan out to their connections; their
+posts are merged into followers' feeds at read time instead.
+"""
+
+from django.conf import settings
+
+from main.pagination import encode_cursor, decode_cursor, keyset_filter
+from accounts import graph
+from .models import Post, TimelineEntry
+
+TIMELINE_ORDERING = ('-created_at', '-post_id')
+POST_ORDERING = ('-created_at', '-id')
+
+
+def fanout_max_followers():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 5000)
+
+
+def fanout_batch_size():
+    return getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+
+
+def timeline_audience(author_id):
+    """User ids whose timelines receive ``author_id``'s posts on write."""
+    audience = {author_id}
+    audience.update(graph.connections(author_id))
+    if graph.follower_counts([author_id])[author_id] <= fanout_max_followers():
+        audience.update(graph.followers(author_id))
+    return audience
+
+
+def fanout_post(post, user_ids=None):
+    """Insert ``post`` into the timelines of its audience in bulk batches."""
+    if user_ids is None:
+        user_ids = timeline_audience(post.author_id)
+    user_ids = sorted(user_ids)
+    batch_size = fanout_batch_size()
+    for start in range(0, len(user_ids), batch_size):
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=uid, post_id=post.id, created_at=post.created_at)
+                for uid in user_ids[start:start + batch_size]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def fanout_on_read_authors(user):
+    """Followed authors too large for fan-out-on-write."""
+    counts = graph.follower_counts(graph.following(user.id))
+    limit = fanout_max_followers()
+    return [uid for uid, n in counts.items() if n > limit]
+
+
+def read_home_timeline(user, cursor=None, page_size=20):
+    """Return ``(posts, next_cursor)`` for ``user``'s home feed.
+
+    Reads one bounded page from the materialized timeline and, if the user
+    follows any fan-out-on-read authors, one bounded page of their posts,
+    then merges the two by ``(created_at, id)``. Raises ``InvalidCursor``.
+    """
+    values = decode_cursor(cursor, Post, POST_ORDERING) if cursor else None
+
+    entries = TimelineEntry.objects.filter(user=user).order_by(*TIMELINE_ORDERING)
+    if values:
+        entries = entries.filter(keyset_filter(TIMELINE_ORDERING, values))
+    post_ids = list(entries.values_list('post_id', flat=True)[:page_size + 1])
+    candidates = Post.objects.filter(id__in=post_ids)
+
+    pulled = fanout_on_read_authors(user)
+    if pulled:
+        extra = Post.objects.filter(author_id__in=pulled).order_by(*POST_ORDERING)
+        if values:
+            extra = extra.filter(keyset_filter(POST_ORDERING, values))
+        extra_ids = list(extra.values_list('id', flat=True)[:page_size + 1])
+        candidates = Post.objects.filter(id__in=set(post_ids) | set(extra_ids))
+
+    rows = list(
+        candidates
+        .select_related('author')
+        .prefetch_related('images')
+        .order_by(*POST_ORDERING)[:page_size + 1]
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1].created_at, rows[-1].id])
+    return rows, next_cursor
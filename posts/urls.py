@@ -3,11 +3,19 @@ from . import views
 
 urlpatterns = [
     path('', views.list_create_posts, name='post-list-create'),
+    path('home/', views.home_feed, name='post-home-feed'),
+    path('ranked/', views.ranked_feed, name='post-ranked-feed'),
+    path('search/', views.search_posts, name='post-search'),
+    path('tags/trending/', views.list_trending_tags, name='tag-trending'),
+    path('tags/<str:tag>/', views.list_tag_posts, name='tag-posts'),
     path('<int:pk>/', views.retrieve_update_delete_post, name='post-detail'),
     path('<int:pk>/like/', views.toggle_like, name='post-like'),
     path('<int:pk>/comments/', views.list_create_comments, name='post-comments'),
+    path('<int:pk>/comments/<int:comment_id>/replies/', views.list_comment_replies, name='post-comment-replies'),
     path('<int:pk>/share/', views.create_share, name='post-share'),
     # Stories
     path('stories/', views.list_stories, name='story-list'),
     path('stories/create/', views.create_story, name='story-create'),
+    path('stories/<int:pk>/view/', views.view_story, name='story-view'),
+    path('stories/<int:pk>/viewers/', views.list_story_viewers, name='story-viewers'),
 ]
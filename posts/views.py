@@ -2,9 +2,42 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Post, PostImage, Like, Comment, Share, Story
-from .serializers import PostSerializer, CommentSerializer, StorySerializer
+from .models import Post, Like, Comment, Share, Story, PostHashtag
+from .timeline import fanout_post, read_home_timeline
+from .likes import like_post, unlike_post
+from .comments import COMMENT_ORDERING, comment_previews, create_comment
+from .cache import serialize_posts, invalidate_post
+from .ingest import save_post_with_images
+from . import search
+from .tags import trending_tags, trending_windows
+from .ranking import get_scorer, rank_feed
+from .stories import active_stories_for, group_stories, story_ttl
+from .story_views import record_view, buffer as story_view_buffer
+from main.instrumentation import timed
+from main.renditions import schedule_renditions
+from notifications.models import Notification
+from notifications.services import notify
+from .serializers import PostSerializer, CommentSerializer, StorySerializer, AuthorSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from main.pagination import paginate_keyset, get_page_size, InvalidCursor
+
+FEED_ORDERING = ('-is_pinned', '-created_at', '-id')
+TAG_ORDERING = ('-created_at', '-post_id')
+
+
+def post_serializer_context(request, posts):
+    """Serializer context with viewer-relative flags resolved for a page of posts."""
+    post_ids = [p.id for p in posts]
+    liked = set()
+    if post_ids and request.user.is_authenticated:
+        liked = set(
+            Like.objects.filter(user=request.user, post_id__in=post_ids).values_list('post_id', flat=True)
+        )
+    return {'request': request, 'liked_post_ids': liked, 'comment_previews': comment_previews(post_ids)}
 
 
 @api_view(['GET', 'POST'])
@@ -12,77 +45,202 @@ from rest_framework.parsers import MultiPartParser, FormParser
 @parser_classes([MultiPartParser, FormParser])
 def list_create_posts(request):
     if request.method == 'GET':
-        posts = Post.objects.select_related('author').prefetch_related('images', 'likes', 'comments', 'shares').order_by('-is_pinned', '-created_at')
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        page_size = get_page_size(
+            request,
+            getattr(settings, 'FEED_PAGE_SIZE', 20),
+            getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+        )
+        posts = Post.objects.select_related('author').prefetch_related('images')
+        try:
+            page, next_cursor = paginate_keyset(posts, FEED_ORDERING, request.query_params.get('cursor'), page_size)
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        results = serialize_posts(page, post_serializer_context(request, page))
+        return Response({'results': results, 'next_cursor': next_cursor})
 
     # POST - create
-    print(f"POST request from: {request.META.get('HTTP_ORIGIN', 'No origin')}")
-    print(f"POST request headers: {dict(request.headers)}")
-    print(f"POST request data: {request.data}")
-    print(f"POST request files: {request.FILES}")
-    
     content = request.data.get('content', '')
-    post = Post.objects.create(author=request.user, content=content)
+    post = Post(author=request.user, content=content)
     # accept multiple files under 'images'
-    files = request.FILES.getlist('images')
-    for f in files:
-        PostImage.objects.create(post=post, image=f)
-    return Response(PostSerializer(post, context={'request': request}).data, status=status.HTTP_201_CREATED)
+    save_post_with_images(post, request.FILES.getlist('images'))
+    transaction.on_commit(lambda: fanout_post(post))
+    context = {'request': request, 'liked_post_ids': set(), 'comment_previews': {}}
+    return Response(PostSerializer(post, context=context).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def home_feed(request):
+    """Viewer's home timeline: own posts plus followed and connected authors."""
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'FEED_PAGE_SIZE', 20),
+        getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+    )
+    try:
+        page, next_cursor = read_home_timeline(request.user, request.query_params.get('cursor'), page_size)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    results = serialize_posts(page, post_serializer_context(request, page))
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ranked_feed(request):
+    """Relevance-ranked feed. ``rank`` selects the scorer (default FEED_SCORER)."""
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'FEED_PAGE_SIZE', 20),
+        getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+    )
+    try:
+        scorer = get_scorer(request.query_params.get('rank'))
+    except KeyError:
+        return Response({'error': 'Unknown ranking'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        post_ids, next_cursor, _ = rank_feed(request.user, scorer, request.query_params.get('cursor'), page_size)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    by_id = Post.objects.select_related('author').prefetch_related('images').in_bulk(post_ids)
+    posts = [by_id[i] for i in post_ids if i in by_id]
+    results = serialize_posts(posts, post_serializer_context(request, posts))
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_posts(request):
+    """Full-text search over posts and comments, best match first.
+
+    Query params: ``q`` (required), ``type`` (``post`` or ``comment``),
+    ``author`` (user id, repeatable), ``cursor`` and ``page_size``. Scores
+    shift as posts are indexed, so later pages are best-effort and may
+    repeat or skip a hit (see posts.search).
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'results': [], 'next_cursor': None})
+    doc_type = request.query_params.get('type')
+    if doc_type and doc_type not in (search.POST, search.COMMENT):
+        return Response({'error': 'Invalid type'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        author_ids = [int(a) for a in request.query_params.getlist('author')]
+    except ValueError:
+        return Response({'error': 'Invalid author'}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'FEED_PAGE_SIZE', 20),
+        getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+    )
+    try:
+        hits, next_cursor = search.search(
+            query, types=[doc_type] if doc_type else None, author_ids=author_ids,
+            cursor=request.query_params.get('cursor'), page_size=page_size,
+        )
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    post_ids = [ref_id for kind, ref_id in hits if kind == search.POST]
+    comment_ids = [ref_id for kind, ref_id in hits if kind == search.COMMENT]
+    posts = list(Post.objects.filter(id__in=post_ids).select_related('author').prefetch_related('images'))
+    posts_data = dict(zip([p.id for p in posts], serialize_posts(posts, post_serializer_context(request, posts))))
+    comments = {c.id: c for c in Comment.objects.filter(id__in=comment_ids).select_related('user')}
+    context = {'request': request}
+
+    results = []
+    for kind, ref_id in hits:
+        if kind == search.POST and ref_id in posts_data:
+            results.append({'type': kind, 'post': posts_data[ref_id]})
+        elif kind == search.COMMENT and ref_id in comments:
+            comment = comments[ref_id]
+            data = dict(CommentSerializer(comment, context=context).data)
+            data['post_id'] = comment.post_id
+            results.append({'type': kind, 'comment': data})
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_tag_posts(request, tag: str):
+    """Posts tagged with ``#tag``, newest first, keyset paginated."""
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'FEED_PAGE_SIZE', 20),
+        getattr(settings, 'FEED_MAX_PAGE_SIZE', 100),
+    )
+    uses = PostHashtag.objects.filter(hashtag__name=tag.lower())
+    try:
+        page, next_cursor = paginate_keyset(uses, TAG_ORDERING, request.query_params.get('cursor'), page_size)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    by_id = Post.objects.select_related('author').prefetch_related('images').in_bulk([u.post_id for u in page])
+    posts = [by_id[u.post_id] for u in page if u.post_id in by_id]
+    results = serialize_posts(posts, post_serializer_context(request, posts))
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_trending_tags(request):
+    """Top hashtags for ``window`` (see TRENDING_WINDOWS), precomputed by update_trending_tags."""
+    window = request.query_params.get('window', 'day')
+    if window not in trending_windows():
+        return Response({'error': 'Invalid window'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = get_page_size(request, 10, 50)
+    return Response([
+        {'tag': name, 'score': round(score, 3)}
+        for name, score in trending_tags(window, limit)
+    ])
 
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def retrieve_update_delete_post(request, pk: int):
     try:
-        post = Post.objects.select_related('author').get(pk=pk)
+        post = Post.objects.select_related('author').prefetch_related('images').get(pk=pk)
     except Post.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        return Response(PostSerializer(post, context={'request': request}).data)
+        return Response(serialize_posts([post], post_serializer_context(request, [post]))[0])
 
     if request.method == 'PUT':
         if post.author_id != request.user.id:
             return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
         content = request.data.get('content', post.content)
         post.content = content
-        post.save(update_fields=['content', 'updated_at'])
-        # Optional: replace images if new files provided
-        files = request.FILES.getlist('images')
-        if files:
-            post.images.all().delete()
-            for f in files:
-                PostImage.objects.create(post=post, image=f)
-        return Response(PostSerializer(post, context={'request': request}).data)
+        # Optional: replace images if new files provided. The save bumps
+        # updated_at, so cached payloads keyed on it are not reused.
+        save_post_with_images(post, request.FILES.getlist('images'), update_fields=['content', 'updated_at'], replace=True)
+        return Response(PostSerializer(post, context=post_serializer_context(request, [post])).data)
 
     # DELETE
     if post.author_id != request.user.id:
         return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+    invalidate_post(post, {'request': request})
     post.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-@api_view(['POST'])
+@api_view(['POST', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def toggle_like(request, pk: int):
-    # Debug authentication
-    print(f"Like request - User authenticated: {request.user.is_authenticated}")
-    print(f"Like request - User: {request.user}")
-    print(f"Like request - Session key: {request.session.session_key}")
-    print(f"Like request - Headers: {dict(request.headers)}")
-    
-    try:
-        post = Post.objects.get(pk=pk)
-    except Post.DoesNotExist:
+    """PUT likes and DELETE unlikes, both idempotent; POST toggles (legacy clients)."""
+    author_id = Post.objects.filter(pk=pk).values_list('author_id', flat=True).first()
+    if author_id is None:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    like, created = Like.objects.get_or_create(post=post, user=request.user)
-    if not created:
-        like.delete()
-        liked = False
+    if request.method == 'POST':
+        like = not Like.objects.filter(post_id=pk, user=request.user).exists()
     else:
-        liked = True
-    return Response({'liked': liked, 'likes_count': post.likes.count()})
+        like = request.method == 'PUT'
+    if like:
+        created, likes_count = like_post(pk, request.user.id)
+        if created:
+            notify(author_id, request.user.id, Notification.Verb.LIKE, pk)
+    else:
+        _, likes_count = unlike_post(pk, request.user.id)
+    return Response({'liked': like, 'likes_count': likes_count})
 
 
 @api_view(['GET', 'POST'])
@@ -94,16 +252,49 @@ def list_create_comments(request, pk: int):
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        comments = post.comments.select_related('user').order_by('created_at')
-        return Response(CommentSerializer(comments, many=True, context={'request': request}).data)
+        # Top-level comments, oldest first; replies are paged separately
+        comments = post.comments.filter(parent__isnull=True).select_related('user')
+        return _comment_page(request, comments)
 
     text = (request.data.get('text') or '').strip()
     if not text:
         return Response({'error': 'Text is required'}, status=status.HTTP_400_BAD_REQUEST)
-    comment = Comment.objects.create(post=post, user=request.user, text=text)
+    parent = None
+    parent_id = request.data.get('parent')
+    if parent_id not in (None, ''):
+        try:
+            parent = Comment.objects.get(pk=int(parent_id), post=post)
+        except (TypeError, ValueError, Comment.DoesNotExist):
+            return Response({'error': 'Parent comment not found'}, status=status.HTTP_400_BAD_REQUEST)
+    comment = create_comment(post, request.user, text, parent=parent)
+    notify(post.author_id, request.user.id, Notification.Verb.COMMENT, post.pk)
     return Response(CommentSerializer(comment, context={'request': request}).data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_comment_replies(request, pk: int, comment_id: int):
+    if not Comment.objects.filter(pk=comment_id, post_id=pk).exists():
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    replies = Comment.objects.filter(parent_id=comment_id).select_related('user')
+    return _comment_page(request, replies)
+
+
+def _comment_page(request, comments):
+    page_size = get_page_size(
+        request,
+        getattr(settings, 'COMMENT_PAGE_SIZE', 20),
+        getattr(settings, 'COMMENT_MAX_PAGE_SIZE', 100),
+    )
+    try:
+        page, next_cursor = paginate_keyset(comments, COMMENT_ORDERING, request.query_params.get('cursor'), page_size)
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    with timed('serializer'):
+        results = CommentSerializer(page, many=True, context={'request': request}).data
+    return Response({'results': results, 'next_cursor': next_cursor})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_share(request, pk: int):
@@ -111,8 +302,12 @@ def create_share(request, pk: int):
         post = Post.objects.get(pk=pk)
     except Post.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
-    Share.objects.create(post=post, user=request.user)
-    return Response({'shared': True, 'shares_count': post.shares.count()})
+    with transaction.atomic():
+        Share.objects.create(post=post, user=request.user)
+        Post.objects.filter(pk=post.pk).update(shares_count=F('shares_count') + 1)
+        notify(post.author_id, request.user.id, Notification.Verb.SHARE, post.pk)
+    post.refresh_from_db(fields=['shares_count'])
+    return Response({'shared': True, 'shares_count': post.shares_count})
 
 
 # -------- Stories --------
@@ -120,22 +315,21 @@ def create_share(request, pk: int):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_stories(request):
-    from django.utils import timezone
-    from datetime import timedelta
-    cutoff = timezone.now() - timedelta(hours=24)
+    """Active stories grouped per author: my own, people I follow, my followers and my connections."""
     me = request.user
-    # Show my own stories, plus stories from people I follow, my followers, and my connections
-    user_ids = {me.id}
-    user_ids.update(me.following.values_list('id', flat=True))
-    user_ids.update(me.followers.values_list('id', flat=True))
-    user_ids.update(me.connections.values_list('id', flat=True))
-    stories = (
-        Story.objects
-        .filter(user_id__in=list(user_ids), created_at__gte=cutoff)
-        .select_related('user')
-        .order_by('-created_at')
-    )
-    return Response(StorySerializer(stories, many=True, context={'request': request}).data)
+    stories = list(active_stories_for(me))
+    context = {'request': request}
+    data = []
+    for author, items, has_unseen, seen in group_stories(me, stories):
+        serialized = StorySerializer(items, many=True, context=context).data
+        for story, item in zip(items, serialized):
+            item['seen'] = story.id in seen
+        data.append({
+            'user': AuthorSerializer(author, context=context).data,
+            'has_unseen': has_unseen,
+            'stories': serialized,
+        })
+    return Response(data)
 
 
 @api_view(['POST'])
@@ -165,6 +359,8 @@ def create_story(request):
         story = Story(user=request.user, content=content or '', background_color=background_color, media_type=media_type)
         story.media = media_file
         story.save()
+        if media_type == Story.MediaType.IMAGE:
+            schedule_renditions(story, 'media', 'renditions')
     else:
         # Text story
         if not content.strip():
@@ -173,3 +369,38 @@ def create_story(request):
         story.save()
 
     return Response(StorySerializer(story, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def view_story(request, pk: int):
+    """Record that the current user opened a story (buffered write)."""
+    try:
+        story = Story.objects.only('id', 'user_id').get(pk=pk, created_at__gte=timezone.now() - story_ttl())
+    except Story.DoesNotExist:
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    record_view(story, request.user)
+    return Response({'seen': True}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_story_viewers(request, pk: int):
+    """Viewers of one of my stories, most recent first."""
+    try:
+        story = Story.objects.get(pk=pk)
+    except Story.DoesNotExist:
+        return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    if story.user_id != request.user.id:
+        return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+    story_view_buffer.flush()
+    story.refresh_from_db(fields=['views_count'])
+    views = story.views.select_related('user').order_by('-viewed_at')[:200]
+    context = {'request': request}
+    return Response({
+        'views_count': story.views_count,
+        'viewers': [
+            {'user': AuthorSerializer(v.user, context=context).data, 'viewed_at': v.viewed_at}
+            for v in views
+        ],
+    })